@@ -0,0 +1,206 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import pygame
+from pygui import *
+
+WIDTH, HEIGHT = 1280, 720
+CELL_WIDTH, CELL_HEIGHT = 80, 24
+
+def grid_positions(count):
+    columns = WIDTH // CELL_WIDTH
+    for index in range(count):
+        column = index % columns
+        row = (index // columns) % (HEIGHT // CELL_HEIGHT)
+        yield (column * CELL_WIDTH, row * CELL_HEIGHT)
+
+def build_label(window, count):
+    for index, position in enumerate(grid_positions(count)):
+        Label(window, position, (CELL_WIDTH, CELL_HEIGHT), f"Label {index}", 16)
+
+def build_button(window, count):
+    for index, position in enumerate(grid_positions(count)):
+        Button(window, position, (CELL_WIDTH, CELL_HEIGHT), f"Button {index}", 16, function=lambda: None)
+
+def build_entry(window, count):
+    for position in grid_positions(count):
+        Entry(window, position, (CELL_WIDTH, CELL_HEIGHT), default_text="Entry", text_size=16)
+
+def build_progressbar(window, count):
+    for index, position in enumerate(grid_positions(count)):
+        ProgressBar(window, position, (CELL_WIDTH, CELL_HEIGHT), 100, starting_value=index % 100, interactable=True)
+
+def build_dropdown(window, count):
+    for position in grid_positions(count):
+        DropDown(window, position, (CELL_WIDTH, CELL_HEIGHT), ["red", "green", "blue"], text_size=16)
+
+def build_frame(window, count):
+    for position in grid_positions(max(1, count // 4)):
+        frame = Frame(window, position, (CELL_WIDTH, CELL_HEIGHT * 4))
+        for row in range(4):
+            Button(frame, (0, row * CELL_HEIGHT), (CELL_WIDTH, CELL_HEIGHT), f"Item {row}", 16)
+
+SCENES = {
+    "label": build_label,
+    "button": build_button,
+    "entry": build_entry,
+    "progressbar": build_progressbar,
+    "dropdown": build_dropdown,
+    "frame": build_frame,
+}
+
+def generate_events(rng, frame):
+    x, y = rng.randrange(WIDTH), rng.randrange(HEIGHT)
+    events = [pygame.event.Event(pygame.MOUSEMOTION, pos=(x, y), rel=(0, 0), buttons=(0, 0, 0)) for _ in range(3)]
+    if frame % 10 == 0:
+        events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(x, y), button=1))
+        events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(x, y), button=1))
+
+    if frame % 3 == 0:
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a, unicode="a", mod=0, scancode=0))
+
+    return events
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run_scene(name, count, frames, dirty_rendering, seed, recording = None):
+    pygame.event.clear()
+    text_cache.reset_stats()
+
+    start = time.perf_counter()
+    window = Window(WIDTH, HEIGHT, fps=0, dirty_rendering=dirty_rendering)
+    SCENES[name](window, count)
+    construction_time = time.perf_counter() - start
+
+    window.update()
+    rng = random.Random(seed)
+    frame_times = []
+    event_time = 0
+    event_count = 0
+    if recording:
+        replayer = EventReplayer(window, recording)
+        frame_times = replayer.run()
+        event_time = sum(replayer.event_times) / 1000
+        frames = len(frame_times)
+        event_count = sum(len(frame[3]) for frame in recording["frames"])
+
+    else:
+        for frame in range(frames):
+            events = generate_events(rng, frame)
+            for event in events:
+                pygame.event.post(event)
+
+            start = time.perf_counter()
+            window.process_events()
+            events_done = time.perf_counter()
+            window.render()
+            end = time.perf_counter()
+
+            frame_times.append((end - start) * 1000)
+            event_time += events_done - start
+            event_count += len(events)
+
+    return {
+        "scene": name,
+        "elements": count,
+        "render": "dirty" if dirty_rendering else "full",
+        "frames": frames,
+        "construction_ms": construction_time * 1000,
+        "frame_ms": {
+            "mean": statistics.fmean(frame_times),
+            "p50": percentile(frame_times, 0.5),
+            "p90": percentile(frame_times, 0.9),
+            "p99": percentile(frame_times, 0.99),
+            "max": max(frame_times),
+        },
+        "events_per_second": event_count / event_time if event_time else 0,
+        "text_cache": text_cache.get_stats(),
+    }
+
+def measure_memory(name, count):
+    pygame.event.clear()
+    window = Window(WIDTH, HEIGHT, fps=0)
+    SCENES[name](window, 4)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    SCENES[name](window, count)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / count
+
+def compare(results, baseline, threshold):
+    previous = {(result["scene"], result["elements"], result["render"]): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get((result["scene"], result["elements"], result["render"]))
+        if not old: continue
+        ratio = result["frame_ms"]["p50"] / old["frame_ms"]["p50"] if old["frame_ms"]["p50"] else 1
+        print(f"{result['scene']:>12} {result['elements']:>7} {result['render']:>5}  p50 {old['frame_ms']['p50']:8.3f} -> {result['frame_ms']['p50']:8.3f} ms  ({ratio:.2f}x)")
+        if ratio > 1 + threshold: regressions.append(result)
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless pygui benchmarks")
+    parser.add_argument("--scenes", nargs="+", default=list(SCENES), choices=list(SCENES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 5000])
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--render", nargs="+", default=["full", "dirty"], choices=["full", "dirty"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p50 frame time increase when comparing")
+    parser.add_argument("--memory", action="store_true", help="also measure allocated bytes per element with tracemalloc")
+    parser.add_argument("--replay", help="replay a recorded event session instead of generated input")
+    args = parser.parse_args()
+
+    recording = EventRecorder.load(args.replay) if args.replay else None
+    results = []
+    for name in args.scenes:
+        for count in args.sizes:
+            for render in args.render:
+                result = run_scene(name, count, args.frames, render == "dirty", args.seed, recording)
+                if args.memory: result["bytes_per_element"] = measure_memory(name, count)
+                results.append(result)
+                print(f"{name:>12} {count:>7} {render:>5}  build {result['construction_ms']:9.2f} ms  p50 {result['frame_ms']['p50']:8.3f} ms  p99 {result['frame_ms']['p99']:8.3f} ms  {result['events_per_second']:12.0f} events/s")
+                if args.memory: print(f"{'':>12} {'':>7} {'':>5}  {result['bytes_per_element']:9.0f} bytes/element")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "sdl": ".".join(map(str, pygame.get_sdl_version())),
+            "platform": platform.platform(),
+            "frames": args.frames,
+            "seed": args.seed,
+            "replay": args.replay,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
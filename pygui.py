@@ -1,46 +1,874 @@
 import pygame
+import asyncio
+import bisect
+import gzip
+import heapq
+import inspect
+import itertools
+import json
+import math
+import os
+import numbers
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from operator import attrgetter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 pygame.font.init()
-pygame.display.init()
+try:
+    pygame.display.init()
+
+except pygame.error:
+    pass
+
+class TextCache:
+
+    def __init__(self, max_size = 2048, max_bytes = 16 * 1024 * 1024) -> None:
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_surface_bytes(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def evict(self):
+        while self.surfaces and (len(self.surfaces) > self.max_size or self.bytes > self.max_bytes):
+            self.bytes -= self.get_surface_bytes(self.surfaces.popitem(last=False)[1])
+
+    def render(self, font, text, antialias, colour, background = None):
+        key = (font, text, antialias, tuple(colour), tuple(background) if background else None)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, colour, background)
+        size = self.get_surface_bytes(surface)
+        if size > self.max_bytes // 8: return surface
+        self.surfaces[key] = surface
+        self.bytes += size
+        self.evict()
+        return surface
+
+    def set_max_size(self, max_size, max_bytes = None):
+        self.max_size = max_size
+        if max_bytes is not None: self.max_bytes = max_bytes
+        self.evict()
+
+    def clear(self):
+        self.surfaces.clear()
+        self.bytes = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0, "size": len(self.surfaces), "max_size": self.max_size, "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+text_cache = TextCache()
+
+class FontRegistry:
+
+    def __init__(self) -> None:
+        self.fonts = {}
+
+    def get(self, font, size, bold = False, italic = False):
+        key = (font, size, bool(bold), bool(italic))
+        pygame_font = self.fonts.get(key)
+        if pygame_font is None:
+            pygame_font = pygame.font.SysFont(font, size, bool(bold), bool(italic))
+            self.fonts[key] = pygame_font
+
+        return pygame_font
+
+    def clear(self):
+        self.fonts.clear()
+
+    def __len__(self):
+        return len(self.fonts)
+
+font_registry = FontRegistry()
+
+def convert_surface(surface):
+    if pygame.display.get_surface() is None: return surface
+    if surface.get_flags() & pygame.SRCALPHA: return surface.convert_alpha()
+    return surface.convert()
+
+class ImageCache:
+
+    def __init__(self, max_workers = 4, max_bytes = 64 * 1024 * 1024) -> None:
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.executor = None
+        self.surfaces = OrderedDict()
+        self.loading = {}
+        self.failed = {}
+
+    @staticmethod
+    def load_surface(filename, size):
+        return pygame.transform.scale(pygame.image.load(filename), size)
+
+    @staticmethod
+    def get_surface_bytes(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def store(self, key, surface):
+        surface = self.surfaces[key] = convert_surface(surface)
+        self.bytes += self.get_surface_bytes(surface)
+        while len(self.surfaces) > 1 and self.bytes > self.max_bytes:
+            self.bytes -= self.get_surface_bytes(self.surfaces.popitem(last=False)[1])
+
+        return surface
+
+    def get(self, filename, size):
+        key = (filename, tuple(size))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        future = self.loading.pop(key, None)
+        return self.store(key, future.result() if future else self.load_surface(filename, key[1]))
+
+    def request(self, filename, size):
+        key = (filename, tuple(size))
+        if key in self.surfaces: return self.get(filename, size)
+        if filename in self.failed: return None
+        if key not in self.loading:
+            if self.executor is None: self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="pygui-image")
+            self.loading[key] = self.executor.submit(self.load_surface, filename, key[1])
+
+        return None
+
+    def collect(self):
+        for key in [key for key, future in self.loading.items() if future.done()]:
+            future = self.loading.pop(key)
+            try:
+                self.store(key, future.result())
+            except Exception as error:
+                self.failed[key[0]] = error
+
+    def poll(self, filename, size):
+        self.collect()
+        key = (filename, tuple(size))
+        if key not in self.surfaces: return None
+        return self.get(filename, size)
+
+    def has_failed(self, filename):
+        return filename in self.failed
+
+    def clear(self):
+        self.surfaces.clear()
+        self.failed.clear()
+        self.bytes = 0
+
+    def get_stats(self):
+        return {"size": len(self.surfaces), "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+image_cache = ImageCache()
+
+class ChromeCache:
+
+    def __init__(self, max_size = 512, max_bytes = 16 * 1024 * 1024, max_area = 256 * 256) -> None:
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.max_area = max_area
+        self.bytes = 0
+        self.surfaces = OrderedDict()
+        self.tiles = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def create_surface(size, colour, border_colour, border_size):
+        if colour is None:
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+
+        else:
+            surface = pygame.Surface(size)
+            surface.fill(colour)
+
+        pygame.draw.rect(surface, border_colour, surface.get_rect(), border_size)
+        return convert_surface(surface)
+
+    @staticmethod
+    def nine_slice(tile, size, border):
+        width, height = size
+        tile_width, tile_height = tile.get_size()
+        surface = pygame.Surface(size, tile.get_flags() & pygame.SRCALPHA)
+        inner_width, inner_height = width - 2 * border, height - 2 * border
+        tile_inner_width, tile_inner_height = tile_width - 2 * border, tile_height - 2 * border
+        for source_x, target_x, source_width, target_width in ((0, 0, border, border), (border, border, tile_inner_width, inner_width), (tile_width - border, width - border, border, border)):
+            for source_y, target_y, source_height, target_height in ((0, 0, border, border), (border, border, tile_inner_height, inner_height), (tile_height - border, height - border, border, border)):
+                piece = tile.subsurface((source_x, source_y, source_width, source_height))
+                if (source_width, source_height) != (target_width, target_height):
+                    piece = pygame.transform.scale(piece, (target_width, target_height))
+
+                surface.blit(piece, (target_x, target_y))
+
+        return convert_surface(surface)
+
+    def get_tile(self, colour, border_colour, border_size):
+        key = (colour, border_colour, border_size)
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.tiles[key] = self.create_surface((2 * border_size + 1, 2 * border_size + 1), colour, border_colour, border_size)
+
+        return tile
+
+    def get(self, size, colour, border_colour, border_size):
+        colour = tuple(colour) if colour is not None else None
+        key = (size, colour, tuple(border_colour), border_size)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        if border_size <= 0 or size[0] <= 2 * border_size or size[1] <= 2 * border_size:
+            surface = self.create_surface(size, colour, key[2], border_size)
+
+        else:
+            surface = self.nine_slice(self.get_tile(colour, key[2], border_size), size, border_size)
+
+        self.surfaces[key] = surface
+        self.bytes += size[0] * size[1] * surface.get_bytesize()
+        while len(self.surfaces) > self.max_size or self.bytes > self.max_bytes:
+            old_surface = self.surfaces.popitem(last=False)[1]
+            self.bytes -= old_surface.get_width() * old_surface.get_height() * old_surface.get_bytesize()
+
+        return surface
+
+    def draw(self, screen, rect, colour, border_colour, border_size):
+        if rect[2] * rect[3] <= self.max_area:
+            screen.blit(self.get(rect[2:], colour, border_colour, border_size), rect[:2])
+            return
+
+        if colour is not None: screen.fill(colour, rect)
+        pygame.draw.rect(screen, border_colour, rect, border_size)
+
+    def clear(self):
+        self.surfaces.clear()
+        self.tiles.clear()
+        self.bytes = 0
+
+    def get_stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.surfaces), "max_size": self.max_size, "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+chrome_cache = ChromeCache()
+
+def draw_chrome(screen, rect, colour, border_colour, border_size):
+    width, height = int(rect[2]), int(rect[3])
+    if width <= 0 or height <= 0 or (colour is None and border_size <= 0): return
+    chrome_cache.draw(screen, (int(rect[0]), int(rect[1]), width, height), colour, border_colour, border_size)
+
+class Profiler:
+
+    HISTOGRAM_BUCKETS = (1, 2, 4, 8, 16.7, 33.3, 50, 100)
+
+    def __init__(self, history = 300) -> None:
+        self.frames = deque(maxlen=history)
+        self.draw_times = {}
+        self.event_times = {}
+        self.overlay = False
+        self.overlay_rect = pygame.Rect(0, 0, 0, 0)
+
+    def record(self, times, element, elapsed):
+        entry = times.get(element)
+        if entry is None: times[element] = [elapsed, 1]
+        else:
+            entry[0] += elapsed
+            entry[1] += 1
+
+    def time_event(self, element, event):
+        start = time.perf_counter()
+        element.check_event(event)
+        self.record(self.event_times, element, time.perf_counter() - start)
+
+    def time_draw(self, element, screen):
+        start = time.perf_counter()
+        element.draw(screen)
+        self.record(self.draw_times, element, time.perf_counter() - start)
+
+    def record_frame(self, events, draw, flip, wait, deferred = 0):
+        self.frames.append((events + draw + flip + wait + deferred, events, draw, flip, wait, deferred))
+
+    def reset(self):
+        self.frames.clear()
+        self.draw_times.clear()
+        self.event_times.clear()
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+
+    @staticmethod
+    def describe(element):
+        text = getattr(element, "text", None)
+        label = f" {text[:20]!r}" if isinstance(text, str) and text else ""
+        return f"{type(element).__name__}({element.x}, {element.y}){label}"
+
+    def get_histogram(self):
+        labels = [f"<={bucket}ms" for bucket in self.HISTOGRAM_BUCKETS] + [f">{self.HISTOGRAM_BUCKETS[-1]}ms"]
+        counts = [0] * len(labels)
+        for frame in self.frames:
+            total = frame[0] * 1000
+            index = 0
+            while index < len(self.HISTOGRAM_BUCKETS) and total > self.HISTOGRAM_BUCKETS[index]:
+                index += 1
+
+            counts[index] += 1
+
+        return dict(zip(labels, counts))
+
+    def get_worst(self, times, top):
+        worst = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        return [{"element": self.describe(element), "total_ms": total * 1000, "calls": calls, "mean_ms": total * 1000 / calls} for element, (total, calls) in worst]
+
+    def snapshot(self, top = 10):
+        frames = list(self.frames)
+        if not frames: return {"frames": 0}
+        totals = sorted(frame[0] * 1000 for frame in frames)
+        phases = {name: sum(frame[index] for frame in frames) * 1000 / len(frames) for index, name in enumerate(("events", "draw", "flip", "wait", "deferred"), 1)}
+        return {
+            "frames": len(frames),
+            "frame_ms": {"mean": sum(totals) / len(totals), "p50": totals[len(totals) // 2], "p99": totals[min(len(totals) - 1, int(len(totals) * 0.99))], "max": totals[-1]},
+            "phase_ms": phases,
+            "histogram": self.get_histogram(),
+            "worst_draw": self.get_worst(self.draw_times, top),
+            "worst_event": self.get_worst(self.event_times, top),
+        }
+
+    def draw_overlay(self, screen):
+        stats = self.snapshot(3)
+        if stats["frames"]:
+            lines = [
+                f"frame {stats['frame_ms']['mean']:.2f}ms  p99 {stats['frame_ms']['p99']:.2f}ms  max {stats['frame_ms']['max']:.2f}ms",
+                "  ".join(f"{name} {value:.2f}" for name, value in stats["phase_ms"].items()),
+            ] + [f"draw {entry['total_ms']:.1f}ms {entry['element']}" for entry in stats["worst_draw"]]
+
+        else:
+            lines = ["no frames recorded"]
+
+        font = font_registry.get(None, 18)
+        surfaces = [font.render(line, True, (255, 255, 255)) for line in lines]
+        self.overlay_rect = pygame.Rect(0, 0, max(surface.get_width() for surface in surfaces) + 10, len(surfaces) * font.get_linesize() + 10)
+        screen.fill((0, 0, 0), self.overlay_rect)
+        for index, surface in enumerate(surfaces):
+            screen.blit(surface, (5, 5 + index * font.get_linesize()))
+
+        return self.overlay_rect
+
+MOUSE_EVENTS = (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL)
+KEY_EVENTS = (pygame.KEYDOWN, pygame.KEYUP, pygame.TEXTINPUT, pygame.TEXTEDITING)
+WAKE_EVENT = pygame.event.custom_type()
+
+class EventRecorder:
+
+    def __init__(self, window) -> None:
+        self.window = window
+        self.frames = []
+        self.frame_count = 0
+        self.start = time.perf_counter()
+
+    @staticmethod
+    def encode_event(event):
+        attributes = {}
+        for name, value in event.dict.items():
+            if isinstance(value, (bool, int, float, str)): attributes[name] = value
+            elif isinstance(value, tuple) and all(isinstance(item, (int, float)) for item in value): attributes[name] = list(value)
+
+        return [event.type, attributes]
+
+    @staticmethod
+    def decode_event(data):
+        event_type, attributes = data
+        return pygame.event.Event(event_type, {name: tuple(value) if isinstance(value, list) else value for name, value in attributes.items()})
+
+    def record(self, events):
+        events = [event for event in events if event.type != WAKE_EVENT]
+        if events:
+            timestamp = round((time.perf_counter() - self.start) * 1000, 3)
+            self.frames.append([self.frame_count, timestamp, list(self.window.mouse_pos), [self.encode_event(event) for event in events]])
+
+        self.frame_count += 1
+
+    def get_recording(self):
+        return {"version": 1, "size": [self.window.width, self.window.height], "frame_count": self.frame_count, "frames": self.frames}
+
+    def save(self, filename):
+        with gzip.open(filename, "wt") as file:
+            json.dump(self.get_recording(), file, separators=(",", ":"))
+
+    @staticmethod
+    def load(filename):
+        with gzip.open(filename, "rt") as file:
+            return json.load(file)
+
+class EventReplayer:
+
+    def __init__(self, window, recording, realtime = False) -> None:
+        self.window = window
+        self.recording = EventRecorder.load(recording) if isinstance(recording, str) else recording
+        self.realtime = realtime
+        self.frame_times = []
+        self.event_times = []
+
+    def queue_frame(self, frame):
+        self.window.mouse_pos = tuple(frame[2])
+        self.window.pending_events.extend(EventRecorder.decode_event(event) for event in frame[3])
+
+    def run(self):
+        window = self.window
+        frames = self.recording["frames"]
+        self.frame_times = []
+        self.event_times = []
+        start = time.perf_counter()
+        if self.realtime:
+            position = 0
+            idle, window.idle = window.idle, False
+            try:
+                while window.running and position < len(frames):
+                    elapsed = (time.perf_counter() - start) * 1000
+                    while position < len(frames) and frames[position][1] <= elapsed:
+                        self.queue_frame(frames[position])
+                        position += 1
+
+                    if idle and position < len(frames) and window.is_idle():
+                        window.wait_for_events(frames[position][1] - elapsed)
+                        continue
+
+                    frame_start = time.perf_counter()
+                    events_start, events_done = window.update()
+                    self.frame_times.append((time.perf_counter() - frame_start) * 1000)
+                    self.event_times.append((events_done - events_start) * 1000)
+
+            finally:
+                window.idle = idle
+
+        else:
+            frames = {frame[0]: frame for frame in frames}
+            for index in range(self.recording["frame_count"]):
+                if not window.running: break
+                if index in frames: self.queue_frame(frames[index])
+                frame_start = time.perf_counter()
+                events_done = window.run_frame()[0]
+                self.frame_times.append((time.perf_counter() - frame_start) * 1000)
+                self.event_times.append((events_done - frame_start) * 1000)
+
+        return self.frame_times
+
+class SpatialGrid:
+
+    def __init__(self, cell_size = 128, max_cells = 64) -> None:
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self.cells = {}
+        self.large = []
+        self.element_cells = {}
+        self.element_bounds = {}
+        self.order = {}
+        self.counter = itertools.count()
+
+    def get_bounds(self, rect):
+        return (rect.left // self.cell_size, max(rect.right - 1, rect.left) // self.cell_size, rect.top // self.cell_size, max(rect.bottom - 1, rect.top) // self.cell_size)
+
+    def get_cells(self, bounds):
+        left, right, top, bottom = bounds
+        return [(x, y) for x in range(left, right + 1) for y in range(top, bottom + 1)]
+
+    def insert(self, element):
+        self.order[element] = next(self.counter)
+        self.update(element)
+
+    def unlink(self, element):
+        cells = self.element_cells.pop(element, None)
+        if cells is None:
+            if element in self.large: self.large.remove(element)
+            return
+
+        for cell in cells:
+            self.cells[cell].remove(element)
+            if not self.cells[cell]: del self.cells[cell]
+
+    def remove(self, element):
+        self.unlink(element)
+        self.element_bounds.pop(element, None)
+        self.order.pop(element, None)
+
+    def update(self, element):
+        bounds = self.get_bounds(element.hitbox)
+        if bounds == self.element_bounds.get(element): return
+        self.element_bounds[element] = bounds
+        self.unlink(element)
+        if (bounds[1] - bounds[0] + 1) * (bounds[3] - bounds[2] + 1) > self.max_cells:
+            self.large.append(element)
+            return
+
+        cells = self.get_cells(bounds)
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(element)
+
+        self.element_cells[element] = cells
+
+    def query_point(self, x, y):
+        cell = self.cells.get((int(x // self.cell_size), int(y // self.cell_size)), ())
+        hits = [element for element in cell if element.hitbox.collidepoint(x, y)]
+        if self.large:
+            hits.extend(element for element in self.large if element.hitbox.collidepoint(x, y))
+
+        return hits
+
+class Container:
+
+    def init_container(self):
+        self.elements = []
+        self.grid = SpatialGrid()
+        self.hovered = []
+        self.captured = []
+
+    def add_element(self, element):
+        self.elements.append(element)
+        self.grid.insert(element)
+
+    def reindex(self, element):
+        self.grid.update(element)
+
+    def child_resized(self, element):
+        pass
+
+    def capture_mouse(self, element):
+        if element not in self.captured:
+            self.captured.append(element)
+
+    def get_mouse_targets(self, x, y):
+        hits = [element for element in self.grid.query_point(x, y) if element.visible and element.interactable]
+        targets = set(hits)
+        targets.update(self.hovered)
+        targets.update(self.captured)
+        self.hovered = hits
+        return sorted(targets, key=self.grid.order.get)
+
+    def send_event(self, event):
+        if event.type in MOUSE_EVENTS:
+            mousex, mousey = self.get_root().get_mouse_pos()
+            position = self.get_position()
+            targets = self.get_mouse_targets(mousex - position[0], mousey - position[1])
+
+        else:
+            targets = self.elements
+
+        profiler = self.get_root().profiler
+        for element in targets:
+            if element.visible and element.interactable:
+                if profiler: profiler.time_event(element, event)
+                else: element.check_event(event)
+
+        if event.type in MOUSE_EVENTS:
+            self.captured = [element for element in targets if element.visible and element.interactable and element.captures_mouse()]
+
+    def get_focus_chain(self):
+        chain = []
+        for element in self.elements:
+            if not element.visible or not element.interactable: continue
+            if element.focusable: chain.append(element)
+            if isinstance(element, Container): chain.extend(element.get_focus_chain())
+
+        return chain
+
+class Observable:
+
+    def __init__(self, value = None) -> None:
+        self.value = value
+        self.bindings = []
+        self.root = None
+        self.changed = False
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+        if self.changed or self.root is None: return
+        self.changed = True
+        self.root.queue_observable(self)
+
+class Binding:
+
+    def __init__(self, element, observable, setter, max_rate = None, smoothing = 0, tolerance = 1e-3) -> None:
+        self.element = element
+        self.observable = observable
+        self.setter = setter
+        self.interval = 1 / max_rate if max_rate else 0
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.current = observable.value
+        self.last_update = time.perf_counter()
+
+        observable.bindings.append(self)
+        observable.root = element.root
+        if self.current is not None: setter(self.current)
+
+    def update(self, now):
+        if now - self.last_update < self.interval: return True
+        target = self.observable.value
+        value = target
+        if self.smoothing and isinstance(target, numbers.Real) and isinstance(self.current, numbers.Real):
+            blend = 1 - math.exp(-min(now - self.last_update, 0.1) / self.smoothing)
+            value = self.current + (target - self.current) * blend
+            if abs(target - value) <= self.tolerance: value = target
+
+        self.last_update = now
+        if value != self.current:
+            self.current = value
+            self.setter(value)
+            self.element.mark_dirty()
+
+        return value != target
+
+    def unbind(self):
+        if self in self.observable.bindings: self.observable.bindings.remove(self)
+        self.element.root.active_bindings.discard(self)
+
+class TextBuffer:
+
+    def __init__(self, text = "", gap_size = 16) -> None:
+        self.buffer = list(text) + [""] * gap_size
+        self.gap_start = len(text)
+        self.gap_end = len(self.buffer)
+        self.string = text
+
+    def __len__(self):
+        return len(self.buffer) - self.gap_end + self.gap_start
+
+    def __getitem__(self, index):
+        if index < 0: index += len(self)
+        if index < 0 or index >= len(self): raise IndexError("TextBuffer index out of range")
+        return self.buffer[index] if index < self.gap_start else self.buffer[index - self.gap_start + self.gap_end]
+
+    def __str__(self):
+        if self.string is None:
+            self.string = "".join(self.buffer[:self.gap_start]) + "".join(self.buffer[self.gap_end:])
+
+        return self.string
+
+    def move_gap(self, position):
+        if position < self.gap_start:
+            count = self.gap_start - position
+            self.buffer[self.gap_end - count:self.gap_end] = self.buffer[position:self.gap_start]
+            self.gap_start -= count
+            self.gap_end -= count
+
+        elif position > self.gap_start:
+            count = position - self.gap_start
+            self.buffer[self.gap_start:self.gap_start + count] = self.buffer[self.gap_end:self.gap_end + count]
+            self.gap_start += count
+            self.gap_end += count
+
+    def insert(self, position, text):
+        self.move_gap(position)
+        if self.gap_end - self.gap_start < len(text):
+            size = max(len(text), len(self.buffer), 16)
+            self.buffer[self.gap_end:self.gap_end] = [""] * size
+            self.gap_end += size
+
+        self.buffer[self.gap_start:self.gap_start + len(text)] = text
+        self.gap_start += len(text)
+        self.string = None
+
+    def delete(self, position, count = 1):
+        self.move_gap(position)
+        self.gap_end = min(self.gap_end + count, len(self.buffer))
+        self.string = None
+
+class Style:
+
+    __slots__ = ("colour", "active_colour", "border_colour", "border_size", "text_colour", "text_size", "bold", "italic", "font")
+    interned = {}
+
+    @classmethod
+    def get(cls, colour = None, active_colour = None, border_colour = None, border_size = 0, text_colour = None, text_size = 0, bold = False, italic = False, font = None):
+        key = (colour, active_colour, border_colour, border_size, text_colour, text_size, bold, italic, font)
+        try:
+            style = cls.interned.get(key)
+
+        except TypeError:
+            key = tuple(value if value is None or isinstance(value, (str, int, float)) else tuple(value) for value in key)
+            style = cls.interned.get(key)
+
+        if style is None:
+            style = object.__new__(cls)
+            for field, value in zip(cls.__slots__, key):
+                object.__setattr__(style, field, value)
+
+            cls.interned[key] = style
+
+        return style
+
+    def replace(self, **changes):
+        values = {field: getattr(self, field) for field in self.__slots__}
+        values.update(changes)
+        return Style.get(**values)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Style objects are immutable, use replace()")
+
+def style_property(field):
+    def set_field(self, value):
+        if getattr(self.style, field) == value: return
+        self.mark_dirty()
+        self.style = self.style.replace(**{field: value})
+        self.mark_dirty()
+
+    return property(attrgetter("style." + field), set_field)
 
 class Element:
 
-    def __init__(self, window, position, dimensions, colour, active_colour, border_size, border_colour, interactable) -> None:
+    __slots__ = ("window", "root", "x", "y", "absolute_position", "width", "height", "preferred_size", "hitbox", "interactable", "_colour", "style", "selected", "visible", "focusable")
+
+    rest_colour = style_property("colour")
+    active_colour = style_property("active_colour")
+    border_colour = style_property("border_colour")
+    border_size = style_property("border_size")
+    text_colour = style_property("text_colour")
+    text_size = style_property("text_size")
+    bold = style_property("bold")
+    italic = style_property("italic")
+    font = style_property("font")
+
+    def __init__(self, window, position, dimensions, colour, active_colour, border_size, border_colour, interactable, style = None) -> None:
         self.window = window
+        self.root = window.get_root()
         self.x, self.y = position
+        self.absolute_position = None
         self.width, self.height = dimensions
+        self.preferred_size = (self.width, self.height)
         self.hitbox = pygame.Rect(self.x, self.y, self.width, self.height)#
         self.interactable = interactable
 
-        self.colour = colour
-        self.rest_colour = colour
-        self.active_colour = active_colour
-
-        self.border_size = border_size
-        self.border_colour = border_colour
+        self._colour = colour
+        self.style = style or Style.get(colour, active_colour, border_colour, border_size)
 
         self.selected = False
         self.visible = True
+        self.focusable = False
 
         self.window.add_element(self)
 
+    @property
+    def colour(self):
+        return self._colour
+
+    @colour.setter
+    def colour(self, colour):
+        if colour == self._colour: return
+        self._colour = colour
+        self.mark_dirty()
+
     def collides(self, x, y):
         return self.hitbox.collidepoint(x, y)
 
+    def captures_mouse(self):
+        return self.selected
+
+    def captures_tab(self):
+        return False
+
+    def focus(self):
+        self.get_root().set_focus(self)
+
+    def blur(self):
+        root = self.get_root()
+        if root.focused is self: root.set_focus(None)
+
+    def set_focused(self, focused):
+        pass
+
+    def update_hitbox(self):
+        if self.hitbox.topleft != (self.x, self.y): self.invalidate_transform()
+        self.hitbox.update(self.x, self.y, self.width, self.height)
+        self.window.reindex(self)
+
+    def invalidate_transform(self):
+        self.absolute_position = None
+
+    def set_position(self, position):
+        dx, dy = position[0] - self.x, position[1] - self.y
+        if not dx and not dy: return
+        self.mark_dirty()
+        self.x, self.y = position
+        self.update_hitbox()
+        self.moved(dx, dy)
+        self.mark_dirty()
+
+    def moved(self, dx, dy):
+        pass
+
+    def set_dimensions(self, dimensions):
+        dw, dh = dimensions[0] - self.width, dimensions[1] - self.height
+        if not dw and not dh: return
+        self.mark_dirty()
+        self.width, self.height = dimensions
+        self.update_hitbox()
+        self.resized(dw, dh)
+        self.mark_dirty()
+
+    def resized(self, dw, dh):
+        pass
+
+    def bind(self, observable, setter = None, max_rate = None, smoothing = 0, tolerance = 1e-3):
+        return Binding(self, observable, setter or self.set_bound_value, max_rate, smoothing, tolerance)
+
+    def set_preferred_size(self, size):
+        if size == self.preferred_size: return
+        self.preferred_size = size
+        self.window.child_resized(self)
+
     def get_position(self):
-        return (self.x + self.window.get_position()[0], self.y + self.window.get_position()[1])
+        if self.absolute_position is None:
+            window_pos = self.window.get_position()
+            self.absolute_position = (self.x + window_pos[0], self.y + window_pos[1])
+
+        return self.absolute_position
+
+    def get_root(self):
+        return self.root
+
+    def get_rect(self):
+        return self.hitbox.move(self.window.get_position())
+
+    def get_dirty_rect(self):
+        return self.get_rect()
+
+    def mark_dirty(self):
+        self.window.invalidate_element(self)
 
     def show(self):
-        self.visible = True
+        self.set_visibility(True)
 
     def hide(self):
-        self.visible = False
+        self.set_visibility(False)
 
     def set_visibility(self, visible):
+        if visible == self.visible: return
         self.visible = visible
+        self.mark_dirty()
+        self.window.child_resized(self)
 
     def toggle_visibility(self):
-        self.visible = not self.visible
+        self.set_visibility(not self.visible)
 
     def check_event(self, event):
         pass
@@ -50,50 +878,92 @@ class Element:
     
 class Label(Element):
 
+    __slots__ = ("_text", "pygame_font", "text_height", "rendered_key", "rendered_lines", "rendered_width")
+
     def __init__(self, window, position, dimensions, text = "", text_size = 0, text_colour = (0, 0, 0), bold = False, italic = None, font = None, colour = (250, 250, 250), border_colour = (200, 200, 200), border_size = 2) -> None:
-        super().__init__(window, position, dimensions, colour, colour, border_size, border_colour, False)
-        self.text = text
-        self.text_size = text_size
-        self.text_colour = text_colour
-        self.bold = bold
-        self.italic = italic
-        self.font = font
-
-        self.pygame_font = pygame.font.SysFont(self.font, self.text_size, self.bold, self.italic)
+        super().__init__(window, position, dimensions, colour, colour, border_size, border_colour, False, Style.get(colour, colour, border_colour, border_size, text_colour, text_size, bold, italic, font))
+        self._text = text
+
+        self.pygame_font = font_registry.get(self.font, self.text_size, self.bold, self.italic)
         self.text_height = self.pygame_font.size(self.text)[1]
 
+        self.rendered_key = None
+        self.rendered_lines = []
+        self.rendered_width = 0
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        if text == self._text: return
+        self.mark_dirty()
+        self._text = text
+        self.mark_dirty()
+
+    def set_bound_value(self, value):
+        self.text = value if isinstance(value, str) else str(value)
+
+    def get_rendered_lines(self):
+        key = (self._text, self.text_colour, self.pygame_font)
+        if key != self.rendered_key:
+            self.rendered_key = key
+            self.rendered_lines = [text_cache.render(self.pygame_font, text, True, self.text_colour) for text in self._text.split("\n")] if self._text else []
+            self.rendered_width = max((surface.get_width() for surface in self.rendered_lines), default=0)
+
+        return self.rendered_lines
+
+    def get_dirty_rect(self):
+        rect = self.get_rect()
+        lines = self.get_rendered_lines()
+        if lines:
+            rect.union_ip((rect.x + 5, rect.y + 5, self.rendered_width, self.text_height * len(lines)))
+
+        return rect
+
     def draw(self, screen):
         if not self.visible: return
-        window_pos = self.window.get_position()
+        window_pos = self.window.get_draw_offset()
         draw_rect = (self.hitbox.x + window_pos[0], self.hitbox.y + window_pos[1], self.hitbox.width, self.hitbox.height)
-        pygame.draw.rect(screen, self.colour, draw_rect)
-        pygame.draw.rect(screen, self.border_colour, draw_rect, self.border_size)
-        if not self.text: return
-        for line, text in enumerate(self.text.split("\n")):
-            screen.blit(self.pygame_font.render(text, True, self.text_colour), (self.hitbox.left + 5 + window_pos[0], self.hitbox.top + 5 + window_pos[1] + self.text_height * line))
+        draw_chrome(screen, draw_rect, self.colour, self.border_colour, self.border_size)
+        for line, surface in enumerate(self.get_rendered_lines()):
+            screen.blit(surface, (self.hitbox.left + 5 + window_pos[0], self.hitbox.top + 5 + window_pos[1] + self.text_height * line))
 
 class Button(Label):
 
-    def __init__(self, window, position, dimensions, text = "", text_size = 32, function = None, function_args = [], function_kargs = {}, text_colour=(0, 0, 0), bold=False, italic=None, font=None, colour=(250, 250, 250), border_colour=(200, 200, 200), border_size=2, active_colour = (150, 150, 150), on_hover = False) -> None:
+    __slots__ = ("function", "on_hover", "function_args", "function_kargs", "hovering", "worker", "on_complete", "on_error", "busy_colour", "busy")
+
+    def __init__(self, window, position, dimensions, text = "", text_size = 32, function = None, function_args = (), function_kargs = None, text_colour=(0, 0, 0), bold=False, italic=None, font=None, colour=(250, 250, 250), border_colour=(200, 200, 200), border_size=2, active_colour = (150, 150, 150), on_hover = False, worker = None, on_complete = None, on_error = None, busy_colour = None) -> None:
         super().__init__(window, position, dimensions, text, text_size, text_colour, bold, italic, font, colour, border_colour, border_size)
         self.interactable = True
         self.function = function
-        self.active_colour = active_colour
+        self.style = self.style.replace(active_colour=active_colour)
         self.on_hover = on_hover
         self.function_args = function_args
         self.function_kargs = function_kargs
         self.hovering = False
         self.selected = False
 
+        self.worker = worker
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.busy_colour = busy_colour if busy_colour is not None else active_colour
+        self.busy = False
+
+    def captures_mouse(self):
+        return self.selected or self.hovering
+
     def check_event(self, event):
         if not self.visible: return
-        mousex, mousey = pygame.mouse.get_pos()
+        mousex, mousey = self.get_root().get_mouse_pos()
         window_pos = self.window.get_position()
         mousex -= window_pos[0]
         mousey -= window_pos[1]
+        state = (self.selected, self.hovering)
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             if self.hitbox.collidepoint(mousex, mousey):
-                if self.function: self.function(*self.function_args, **self.function_kargs)
+                if self.function and not self.busy: self.run_function()
                 self.selected = True
 
         if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
@@ -105,28 +975,50 @@ class Button(Label):
         else:
             self.hovering = False
 
+        if state != (self.selected, self.hovering):
+            self.mark_dirty()
+
+    def run_function(self):
+        if self.worker is None:
+            self.get_root().call(self.function, self.function_args, self.function_kargs)
+            return
+
+        self.busy = True
+        self.mark_dirty()
+        self.get_root().submit(self.function, self.function_args, self.function_kargs, self.job_done, self.worker == "process")
+
+    def job_done(self, future):
+        self.busy = False
+        self.mark_dirty()
+        try:
+            result = future.result()
+        except Exception as error:
+            if self.on_error: self.get_root().call(self.on_error, (error,))
+            else: sys.excepthook(type(error), error, error.__traceback__)
+            return
+
+        if self.on_complete: self.get_root().call(self.on_complete, (result,))
+
     def draw(self, screen):
         if not self.visible: return
 
-        if not self.on_hover:
-            if self.selected: self.colour = self.active_colour
-            if not self.selected: self.colour = self.rest_colour
+        if self.busy: self._colour = self.busy_colour
+        elif not self.on_hover:
+            if self.selected: self._colour = self.active_colour
+            if not self.selected: self._colour = self.rest_colour
         else:
-            if self.hovering: self.colour = self.active_colour
-            if not self.hovering: self.colour = self.rest_colour
+            if self.hovering: self._colour = self.active_colour
+            if not self.hovering: self._colour = self.rest_colour
 
         super().draw(screen)
     
 class Entry(Element):
 
+    __slots__ = ("default_text", "hidden", "lines", "input_character", "restricted", "tab_length", "starting_width", "default_text_colour", "buffers", "line_surfaces", "line_widths", "prefix_widths", "char_widths", "current_line", "current_pos", "pygame_font", "text_height", "input_width")
+
     def __init__(self, window, position, dimensions, colour=(250, 250, 250), border_size = 2, border_colour=(200, 200, 200), default_text = None, text_size = 32, text_colour = (0, 0, 0), bold = False, italic = False, font = None, hidden = None, lines = 1, input_character = "|", restricted = True, tab_length = 4) -> None:
-        super().__init__(window, position, dimensions, colour, None, border_size, border_colour, True)
+        super().__init__(window, position, dimensions, colour, None, border_size, border_colour, True, Style.get(colour, None, border_colour, border_size, text_colour, text_size, bold, italic, font))
         self.default_text = default_text
-        self.text_size = text_size
-        self.text_colour = text_colour
-        self.bold = bold
-        self.italic = italic
-        self.font = font
         self.hidden = hidden
         self.lines = lines
         self.input_character = input_character
@@ -134,164 +1026,223 @@ class Entry(Element):
         self.tab_length = tab_length
 
         self.starting_width = self.width
+        self.focusable = True
 
         self.default_text_colour = (200, 200, 200)
 
-        self.text = ["" for _ in range(self.lines)]
-        self.raw_text = ""
+        self.buffers = [TextBuffer() for _ in range(self.lines)]
+        self.line_surfaces = [None for _ in range(self.lines)]
+        self.line_widths = [0 for _ in range(self.lines)]
+        self.prefix_widths = [[0] for _ in range(self.lines)]
+        self.char_widths = {}
         self.current_line = 0
         self.current_pos = 0
 
-        self.pygame_font = pygame.font.SysFont(self.font, self.text_size, self.bold, self.italic)
-        self.text_height = self.pygame_font.size(self.text[0])[1]
+        self.pygame_font = font_registry.get(self.font, self.text_size, self.bold, self.italic)
+        self.text_height = self.pygame_font.size("")[1]
+        self.input_width = self.pygame_font.size(self.input_character)[0]
+
+    @property
+    def text(self):
+        return [str(buffer) for buffer in self.buffers]
+
+    @property
+    def raw_text(self):
+        return "".join(self.text)
 
     def get(self, line=None):
         if line:
-            return self.text[line]
+            return str(self.buffers[line])
         
         else:
             return "\n".join(self.text)
+
+    def is_empty(self):
+        return not any(len(buffer) for buffer in self.buffers)
+
+    def get_char_width(self, char):
+        if self.hidden: char = self.hidden
+        width = self.char_widths.get(char)
+        if width is None:
+            width = self.char_widths[char] = self.pygame_font.size(char)[0]
+
+        return width
+
+    def get_prefix_width(self, line, pos):
+        prefix = self.prefix_widths[line]
+        if len(prefix) <= pos:
+            buffer = self.buffers[line]
+            for index in range(len(prefix) - 1, pos):
+                prefix.append(prefix[-1] + self.get_char_width(buffer[index]))
+
+        return prefix[pos]
+
+    def insert_char(self, key):
+        self.buffers[self.current_line].insert(self.current_pos, key)
+        self.line_widths[self.current_line] += self.get_char_width(key)
+        del self.prefix_widths[self.current_line][self.current_pos + 1:]
+        self.current_pos += 1
+
+    def delete_char(self):
+        removed_char = self.buffers[self.current_line][self.current_pos - 1]
+        self.buffers[self.current_line].delete(self.current_pos - 1)
+        self.line_widths[self.current_line] -= self.get_char_width(removed_char)
+        del self.prefix_widths[self.current_line][self.current_pos:]
+        self.current_pos -= 1
+        return removed_char
         
     def add_char_line(self, key):
         if key in [pygame.K_ESCAPE]: return
-        if self.hidden: text = "".join(self.hidden for _ in range(len(self.text[self.current_line])))
-        else: text = self.text[self.current_line]
-
-        if self.pygame_font.size(text + key + self.input_character)[0] > self.width:
+        if self.line_widths[self.current_line] + self.get_char_width(key) + self.input_width > self.width:
             if self.restricted:
                 self.current_line += 1
                 if self.current_line == self.lines: 
                     self.current_line = self.lines - 1
-                    self.current_pos = len(self.text[self.current_line])
+                    self.current_pos = len(self.buffers[self.current_line])
 
                 else:
+                    self.current_pos = min(self.current_pos, len(self.buffers[self.current_line]))
                     self.add_char_line(key)
 
             else:
-                self.width += self.pygame_font.size(self.hidden if self.hidden else key)[0]
-                self.hitbox.width = self.width
-
-                self.text[self.current_line] = self.text[self.current_line][:self.current_pos] + key + self.text[self.current_line][self.current_pos:]
-                self.raw_text = self.raw_text[:self.current_pos] + key + self.raw_text[self.current_pos:]
-                self.current_pos += 1
+                self.width += self.get_char_width(key)
+                self.update_hitbox()
+                self.set_preferred_size((self.width, self.height))
+                self.insert_char(key)
 
         else:
-            self.text[self.current_line] = self.text[self.current_line][:self.current_pos] + key + self.text[self.current_line][self.current_pos:]
-            self.raw_text = self.raw_text[:self.current_pos] + key + self.raw_text[self.current_pos:]
-            self.current_pos += 1
+            self.insert_char(key)
 
     def check_event(self, event):
         if not self.visible: return
-        mousex, mousey = pygame.mouse.get_pos()
+        mousex, mousey = self.get_root().get_mouse_pos()
         window_pos = self.window.get_position()
         mousex -= window_pos[0]
         mousey -= window_pos[1]
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            if self.hitbox.collidepoint(mousex, mousey):
-                self.selected = not self.selected
+            if self.hitbox.collidepoint(mousex, mousey) and not self.selected: self.focus()
+            elif self.selected: self.blur()
+            
+        if self.selected and event.type == pygame.KEYDOWN:
+            self.mark_dirty()
+            self.handle_key(event)
+            self.mark_dirty()
+
+    def captures_tab(self):
+        return self.lines > 1
+
+    def set_focused(self, focused):
+        self.selected = focused
+        if focused: self.window.capture_mouse(self)
+        self.mark_dirty()
+
+    def handle_key(self, event):
+        if event.key == pygame.K_RETURN:
+            self.current_line += 1
+            if self.current_line == self.lines: 
+                self.current_line = self.lines - 1
+                
+            else:
+                self.current_pos = len(self.buffers[self.current_line])
+
+        elif event.key == pygame.K_BACKSPACE:
+            if self.current_pos == 0:
+                self.current_line -= 1
+                if self.current_line < 0: 
+                    self.current_line = 0
+
+                else:
+                    self.current_pos = len(self.buffers[self.current_line])
 
             else:
-                self.selected = False
+                removed_char = self.delete_char()
+                if not self.restricted and self.width > self.starting_width:
+                    self.width -= self.get_char_width(removed_char)
+                    self.update_hitbox()
+                    self.set_preferred_size((self.width, self.height))
+
+        elif event.key == pygame.K_UP:
+            self.current_line -= 1
+            if self.current_line < 0: 
+                self.current_line = 0
             
-        if self.selected:
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:
-                    self.current_line += 1
-                    if self.current_line == self.lines: 
-                        self.current_line = self.lines - 1
-                        
-                    else:
-                        self.current_pos = len(self.text[self.current_line])
-
-                elif event.key == pygame.K_BACKSPACE:
-                    if self.current_pos == 0:
-                        self.current_line -= 1
-                        if self.current_line < 0: 
-                            self.current_line = 0
-
-                        else:
-                            self.current_pos = len(self.text[self.current_line])
-
-                    else:
-                        removed_char = self.text[self.current_line][self.current_pos-1]
-                        self.text[self.current_line] = self.text[self.current_line][:self.current_pos - 1] + self.text[self.current_line][self.current_pos:]
-                        self.raw_text = self.raw_text[:self.current_pos - 1] + self.raw_text[self.current_pos:]
-                        self.current_pos -= 1
-
-                        if not self.restricted and self.width > self.starting_width:
-                            self.width -= self.pygame_font.size(self.hidden if self.hidden else removed_char)[0]
-                            self.hitbox.width = self.width
-
-                elif event.key == pygame.K_UP:
-                    self.current_line -= 1
-                    if self.current_line < 0: 
-                        self.current_line = 0
-                    
-                    self.current_pos = len(self.text[self.current_line]) if self.current_pos > len(self.text[self.current_line]) else self.current_pos
-
-                elif event.key == pygame.K_DOWN:
-                    self.current_line += 1
-                    if self.current_line == self.lines: 
-                        self.current_line = self.lines - 1
-
-                    self.current_pos = len(self.text[self.current_line]) if self.current_pos > len(self.text[self.current_line]) else self.current_pos
-
-                elif event.key == pygame.K_RIGHT:
-                    self.current_pos += 1
-                    if self.current_pos > len(self.text[self.current_line]):
-                        self.current_line += 1
-                        if self.current_line == self.lines:
-                            self.current_line = self.lines - 1
-                            self.current_pos -= 1
+            self.current_pos = len(self.buffers[self.current_line]) if self.current_pos > len(self.buffers[self.current_line]) else self.current_pos
 
-                        else: 
-                            self.current_pos = 0
+        elif event.key == pygame.K_DOWN:
+            self.current_line += 1
+            if self.current_line == self.lines: 
+                self.current_line = self.lines - 1
 
-                elif event.key == pygame.K_LEFT:
+            self.current_pos = len(self.buffers[self.current_line]) if self.current_pos > len(self.buffers[self.current_line]) else self.current_pos
+
+        elif event.key == pygame.K_RIGHT:
+            self.current_pos += 1
+            if self.current_pos > len(self.buffers[self.current_line]):
+                self.current_line += 1
+                if self.current_line == self.lines:
+                    self.current_line = self.lines - 1
                     self.current_pos -= 1
-                    if self.current_pos < 0:
-                        self.current_line -= 1
-                        if self.current_line < 0:
-                            self.current_line = 0
-                            self.current_pos += 1
-                        else: 
-                            self.current_pos = len(self.text[self.current_line])
-
-                elif event.key == pygame.K_TAB:
-                    for _ in range(self.tab_length):
-                        self.add_char_line(" ")
 
-                else:
-                    key = event.unicode
-                    if key == None or key == "": return
-                    self.add_char_line(key)
+                else: 
+                    self.current_pos = 0
 
-    def draw_text(self, screen):
-        window_pos = self.window.get_position()
-        if len(self.raw_text) == 0 and self.default_text and not self.selected:
-            screen.blit(self.pygame_font.render(self.default_text, True, self.default_text_colour), (self.hitbox.left + 5 + window_pos[0], self.hitbox.top + 5 + window_pos[1]))
+        elif event.key == pygame.K_LEFT:
+            self.current_pos -= 1
+            if self.current_pos < 0:
+                self.current_line -= 1
+                if self.current_line < 0:
+                    self.current_line = 0
+                    self.current_pos += 1
+                else: 
+                    self.current_pos = len(self.buffers[self.current_line])
+
+        elif event.key == pygame.K_TAB:
+            for _ in range(self.tab_length):
+                self.add_char_line(" ")
 
         else:
-            for line, text in enumerate(self.text):
+            key = event.unicode
+            if key == None or key == "": return
+            self.add_char_line(key)
+
+    def get_line_surface(self, line):
+        buffer = self.buffers[line]
+        text = self.hidden * len(buffer) if self.hidden else str(buffer)
+        key = (text, self.text_colour, self.pygame_font)
+        cached = self.line_surfaces[line]
+        if cached is None or cached[0] != key:
+            cached = (key, self.pygame_font.render(text, True, self.text_colour))
+            self.line_surfaces[line] = cached
 
-                if self.hidden: text = "".join(self.hidden for _ in range(len(text)))
+        return cached[1]
 
-                if self.current_line == line and self.selected:
-                    text = text[:self.current_pos] + self.input_character + text[self.current_pos:]
+    def draw_text(self, screen):
+        window_pos = self.window.get_draw_offset()
+        text_x = self.hitbox.left + 5 + window_pos[0]
+        text_y = self.hitbox.top + 5 + window_pos[1]
+        if self.default_text and not self.selected and self.is_empty():
+            screen.blit(text_cache.render(self.pygame_font, self.default_text, True, self.default_text_colour), (text_x, text_y))
 
-                screen.blit(self.pygame_font.render(text, True, self.text_colour), (self.hitbox.left + 5 + window_pos[0], self.hitbox.top + 5 + window_pos[1] + self.text_height * line))
+        else:
+            for line, buffer in enumerate(self.buffers):
+                if not len(buffer): continue
+                screen.blit(self.get_line_surface(line), (text_x, text_y + self.text_height * line))
 
+            if self.selected:
+                cursor_x = text_x + self.get_prefix_width(self.current_line, self.current_pos)
+                screen.blit(text_cache.render(self.pygame_font, self.input_character, True, self.text_colour), (cursor_x, text_y + self.text_height * self.current_line))
 
     def draw(self, screen):
         if not self.visible: return
-        window_pos = self.window.get_position()
+        window_pos = self.window.get_draw_offset()
         draw_rect = (self.hitbox.x + window_pos[0], self.hitbox.y + window_pos[1], self.hitbox.width, self.hitbox.height)
-        pygame.draw.rect(screen, self.colour, draw_rect)
-        pygame.draw.rect(screen, self.border_colour, draw_rect, self.border_size)
+        draw_chrome(screen, draw_rect, self.colour, self.border_colour, self.border_size)
         self.draw_text(screen)
 
 class ProgressBar(Element):
 
+    __slots__ = ("min_value", "max_value", "current_value", "bar_colour", "vertical", "reversed_dir", "bar_rect")
+
     def __init__(self, window, position, dimensions, max_value, colour=(250, 250, 250), border_size = 2, border_colour=(100, 100, 100), min_value = 0, starting_value = None, bar_colour = (0, 255, 0), interactable = False, vertical = False, reversed_dir = False) -> None:
         super().__init__(window, position, dimensions, colour, None, border_size, border_colour, interactable)
         self.min_value = min_value
@@ -305,16 +1256,42 @@ class ProgressBar(Element):
         if self.current_value < self.min_value: self.current_value = self.min_value
         if self.vertical: self.bar_rect = pygame.Rect(self.x + self.border_size, self.y + self.border_size, self.width - 2*self.border_size, 0)
         else: self.bar_rect = pygame.Rect(self.x + self.border_size, self.y + self.border_size, 0, self.height - 2*self.border_size)
+        self.update_bar()
+
+    def moved(self, dx, dy):
+        self.bar_rect.move_ip(dx, dy)
+
+    def resized(self, dw, dh):
+        self.bar_rect.update(self.x + self.border_size, self.y + self.border_size, self.width - 2*self.border_size, self.height - 2*self.border_size)
+        self.update_bar()
+
+    def update_bar(self):
+        bar_rect = tuple(self.bar_rect)
+        if self.vertical:
+            self.bar_rect.height = ((self.current_value - self.min_value) / (self.max_value - self.min_value)) * (self.height - 2*self.border_size)
+            if self.reversed_dir: self.bar_rect.y = self.height - self.bar_rect.height + self.y - self.border_size
+
+        else: 
+            self.bar_rect.width = ((self.current_value - self.min_value) / (self.max_value - self.min_value)) * (self.width - 2*self.border_size)
+            if self.reversed_dir: self.bar_rect.x = self.width - self.bar_rect.width + self.x - self.border_size
+
+        if bar_rect != tuple(self.bar_rect):
+            self.mark_dirty()
 
     def set_value(self, value):
         if value < self.min_value: value = self.min_value
         if value > self.max_value: value = self.max_value
+        if value == self.current_value: return
         self.current_value = value
+        self.update_bar()
+
+    def set_bound_value(self, value):
+        self.set_value(value)
 
     def set_percentage(self, percentage):
         if percentage < 0: percentage = 0
         if percentage > 1: percentage = 1
-        self.current_value = ((self.max_value - self.min_value) * percentage) + self.min_value
+        self.set_value(((self.max_value - self.min_value) * percentage) + self.min_value)
 
     def get_percentage(self):
         return (self.current_value - self.min_value) / (self.max_value - self.min_value)
@@ -325,7 +1302,7 @@ class ProgressBar(Element):
     def check_event(self, event):
         if not self.visible: return
         if self.interactable:
-            mousex, mousey = pygame.mouse.get_pos()
+            mousex, mousey = self.get_root().get_mouse_pos()
             window_pos = self.window.get_position()
             mousex -= window_pos[0]
             mousey -= window_pos[1]
@@ -345,25 +1322,20 @@ class ProgressBar(Element):
                     if self.reversed_dir: self.set_percentage(1-(mousex - self.x) / self.width)
                     else: self.set_percentage((mousex - self.x) / self.width)
 
-        if self.vertical:
-            self.bar_rect.height = ((self.current_value - self.min_value) / (self.max_value - self.min_value)) * (self.height - 2*self.border_size)
-            if self.reversed_dir: self.bar_rect.y = self.height - self.bar_rect.height + self.y - self.border_size
-
-        else: 
-            self.bar_rect.width = ((self.current_value - self.min_value) / (self.max_value - self.min_value)) * (self.width - 2*self.border_size)
-            if self.reversed_dir: self.bar_rect.x = self.width - self.bar_rect.width + self.x - self.border_size
+        self.update_bar()
     
     def draw(self, screen):
         if not self.visible: return
-        window_pos = self.window.get_position()
+        window_pos = self.window.get_draw_offset()
         draw_rect = (self.hitbox.x + window_pos[0], self.hitbox.y + window_pos[1], self.hitbox.width, self.hitbox.height)
         draw_bar_rect = (self.bar_rect.x + window_pos[0], self.bar_rect.y + window_pos[1], self.bar_rect.width, self.bar_rect.height)
-        pygame.draw.rect(screen, self.colour, draw_rect)
-        pygame.draw.rect(screen, self.border_colour, draw_rect, self.border_size)
+        draw_chrome(screen, draw_rect, self.colour, self.border_colour, self.border_size)
         pygame.draw.rect(screen, self.bar_colour, draw_bar_rect)
 
 class ScrollBar(Element):
 
+    __slots__ = ("scroll_height", "scroll_width", "scroll_colour", "scroll_border_size", "scroll_border_colour", "scroll_x", "scroll_y", "clamp_top", "clamp_bottom", "clamp_left", "clamp_right", "scroll_rect", "scrollable", "scrollable_window", "scroll_speed", "linked_elements")
+
     def __init__(self, window, position, dimensions, colour=(250, 250, 250), border_size = 2, border_colour=(100, 100, 100), scroll_height = 50, scroll_width = 20, scroll_colour = (100, 100, 100), scroll_border_size = 1, scroll_border_colour = (50, 50, 50), scrollable = True, scroll_speed = 0.01, scrollable_window = False) -> None:
         super().__init__(window, position, dimensions, colour, None, border_size, border_colour, True)
         self.scroll_height = scroll_height
@@ -376,25 +1348,52 @@ class ScrollBar(Element):
         self.scroll_y = self.y
 
         self.clamp_top = self.y
-        self.clamp_bottom = self.height - self.scroll_height
+        self.clamp_bottom = self.y + self.height - self.scroll_height
 
         self.clamp_left = self.x
-        self.clamp_right = self.width - self.scroll_width
+        self.clamp_right = self.x + self.width - self.scroll_width
 
         self.scroll_rect = pygame.Rect(self.x, self.y, self.scroll_width, self.scroll_height)
         self.scrollable = scrollable
         self.scrollable_window = scrollable_window
         self.scroll_speed = scroll_speed
+        self.linked_elements = []
+        if self.scrollable and self.scrollable_window: self.window.capture_mouse(self)
+
+    def link(self, element):
+        self.linked_elements.append(element)
+
+    def resized(self, dw, dh):
+        x, y = self.get()
+        self.clamp_bottom = self.y + self.height - self.scroll_height
+        self.clamp_right = self.x + self.width - self.scroll_width
+        self.set_x(x)
+        self.set_y(y)
+
+    def moved(self, dx, dy):
+        self.scroll_x += dx
+        self.scroll_y += dy
+        self.clamp_left += dx
+        self.clamp_right += dx
+        self.clamp_top += dy
+        self.clamp_bottom += dy
+        self.scroll_rect.move_ip(dx, dy)
+
+    def scrolled(self):
+        self.mark_dirty()
+        for element in self.linked_elements:
+            element.mark_dirty()
+
+    def captures_mouse(self):
+        return self.selected or (self.scrollable and self.scrollable_window)
 
     def draw(self, screen):
         if not self.visible: return
-        window_pos = self.window.get_position()
+        window_pos = self.window.get_draw_offset()
         draw_rect = (self.hitbox.x + window_pos[0], self.hitbox.y + window_pos[1], self.hitbox.width, self.hitbox.height)
         draw_scroll_rect = (self.scroll_rect.x + window_pos[0], self.scroll_rect.y + window_pos[1], self.scroll_rect.width, self.scroll_rect.height)
-        pygame.draw.rect(screen, self.colour, draw_rect)
-        pygame.draw.rect(screen, self.border_colour, draw_rect, self.border_size)
-        pygame.draw.rect(screen, self.scroll_colour, draw_scroll_rect)
-        pygame.draw.rect(screen, self.scroll_border_colour, draw_scroll_rect, self.scroll_border_size)
+        draw_chrome(screen, draw_rect, self.colour, self.border_colour, self.border_size)
+        draw_chrome(screen, draw_scroll_rect, self.scroll_colour, self.scroll_border_colour, self.scroll_border_size)
 
     def get_y(self):
         return ((self.scroll_y - self.clamp_top) / (self.clamp_bottom - self.clamp_top)) if (self.clamp_bottom - self.clamp_top) > 0 else 0
@@ -404,6 +1403,20 @@ class ScrollBar(Element):
     
     def get(self):
         return (self.get_x(), self.get_y())
+
+    def set_y(self, value):
+        position = (self.scroll_x, self.scroll_y)
+        self.scroll_y = self.clamp_top + min(max(value, 0), 1) * max(self.clamp_bottom - self.clamp_top, 0)
+        self.check_scroll()
+        self.scroll_rect.y = self.scroll_y
+        if position != (self.scroll_x, self.scroll_y): self.scrolled()
+
+    def set_x(self, value):
+        position = (self.scroll_x, self.scroll_y)
+        self.scroll_x = self.clamp_left + min(max(value, 0), 1) * max(self.clamp_right - self.clamp_left, 0)
+        self.check_scroll()
+        self.scroll_rect.x = self.scroll_x
+        if position != (self.scroll_x, self.scroll_y): self.scrolled()
     
     def check_scroll(self):
         if self.scroll_y >= self.clamp_bottom:
@@ -420,15 +1433,18 @@ class ScrollBar(Element):
     
     def check_event(self, event):
         if not self.visible: return
-        mousex, mousey = pygame.mouse.get_pos()
+        mousex, mousey = self.get_root().get_mouse_pos()
         window_pos = self.window.get_position()
         mousex -= window_pos[0]
         mousey -= window_pos[1]
+        scroll_position = (self.scroll_x, self.scroll_y)
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.hitbox.collidepoint(mousex, mousey):
             self.selected = True
+            self.get_root().request_frames(self)
             
         elif event.type == pygame.MOUSEBUTTONUP and event.button == 1 and self.selected:
             self.selected = False
+            self.get_root().release_frames(self)
 
         if self.scrollable:
             if event.type == pygame.MOUSEWHEEL and (self.hitbox.collidepoint(mousex, mousey) or self.scrollable_window):
@@ -449,20 +1465,72 @@ class ScrollBar(Element):
             self.scroll_rect.y = self.scroll_y
             self.scroll_rect.x = self.scroll_x
 
-class Frame(Element):
+        if scroll_position != (self.scroll_x, self.scroll_y):
+            self.scrolled()
+
+class Frame(Container, Element):
 
-    def __init__(self, window, position, dimensions, colour=(250, 250, 250), border_size = 2, border_colour=(100, 100, 100), draggable = False) -> None:
+    def __init__(self, window, position, dimensions, colour=(250, 250, 250), border_size = 2, border_colour=(100, 100, 100), draggable = False, cached = False) -> None:
         super().__init__(window, position, dimensions, colour, None, border_size, border_colour, True)
         self.draggable = draggable
-        self.elements = []
+        self.init_container()
+
+        self.cached = cached
+        self.cache_surface = None
+        self.cache_dirty = True
+        self.rendering_cache = False
+        self.draw_offset = None
 
     def add_element(self, element):
-        self.elements.append(element)
+        super().add_element(element)
+        self.cache_dirty = True
+        self.mark_dirty()
+
+    def invalidate_element(self, element):
+        self.cache_dirty = True
+        self.window.invalidate_element(element)
+
+    def invalidate_cache(self):
+        self.cache_dirty = True
+        self.mark_dirty()
+
+    def get_draw_offset(self):
+        if self.rendering_cache: return (0, 0)
+        if self.draw_offset is None:
+            window_pos = self.window.get_draw_offset()
+            self.draw_offset = (self.x + window_pos[0], self.y + window_pos[1])
+
+        return self.draw_offset
+
+    def resized(self, dw, dh):
+        self.cache_dirty = True
+        for element in self.elements:
+            if isinstance(element, Layout) and element.fill:
+                element.set_dimensions((self.width, self.height))
+
+    def invalidate_draw_offsets(self):
+        for element in self.elements:
+            if isinstance(element, Frame):
+                element.draw_offset = None
+                element.invalidate_draw_offsets()
+
+    def invalidate_transform(self):
+        super().invalidate_transform()
+        self.draw_offset = None
+        for element in self.elements:
+            element.invalidate_transform()
+
+    def capture_mouse(self, element):
+        super().capture_mouse(element)
+        self.window.capture_mouse(self)
+
+    def captures_mouse(self):
+        return self.selected or bool(self.hovered) or bool(self.captured)
 
     def collides(self, x, y):
         if self.hitbox.collidepoint(x, y):
             if self.draggable: return True
-            for element in self.elements:
+            for element in self.grid.query_point(x - self.x, y - self.y):
                 if element.collides(x - self.x, y - self.y) and element.interactable:
                     return True
                 
@@ -470,26 +1538,29 @@ class Frame(Element):
 
     def check_event(self, event):
         if not self.visible: return
-        mousex, mousey = pygame.mouse.get_pos()
+        mousex, mousey = self.get_root().get_mouse_pos()
         window_pos = self.window.get_position()
         mousex -= window_pos[0]
         mousey -= window_pos[1]
         isTouchingElement = False
         if not self.selected:
-            for element in self.elements:
-                if element.visible and element.interactable:
-                    element.check_event(event)
-                    if element.collides(mousex - self.x, mousey - self.y):
-                        isTouchingElement = True
+            self.send_event(event)
+            for element in self.grid.query_point(mousex - self.x, mousey - self.y):
+                if element.visible and element.interactable and element.collides(mousex - self.x, mousey - self.y):
+                    isTouchingElement = True
+                    break
         
         if self.draggable and not isTouchingElement:
+            position = (self.x, self.y)
             if event.type == pygame.MOUSEBUTTONDOWN and self.hitbox.collidepoint(mousex, mousey):
                 self.selected = True
                 self.offset_x = mousex - self.x
                 self.offset_y = mousey - self.y
+                self.get_root().request_frames(self)
 
             if event.type == pygame.MOUSEBUTTONUP and self.selected:
                 self.selected = False
+                self.get_root().release_frames(self)
 
             if self.selected:
                 self.x = mousex - self.offset_x
@@ -507,136 +1578,859 @@ class Frame(Element):
             if self.y < 0:
                 self.y = 0
 
-            self.hitbox.x = self.x
-            self.hitbox.y = self.y
+            if position != (self.x, self.y):
+                self.mark_dirty()
+                self.update_hitbox()
+                self.mark_dirty()
+
+    def render_cache(self):
+        if self.cache_surface is None or self.cache_surface.get_size() != (self.width, self.height):
+            self.cache_surface = pygame.Surface((self.width, self.height))
+
+        self.rendering_cache = True
+        self.invalidate_draw_offsets()
+        self.draw_contents(self.cache_surface, (0, 0, self.width, self.height))
+        self.rendering_cache = False
+        self.invalidate_draw_offsets()
+        self.cache_dirty = False
+
+    def draw_contents(self, screen, draw_rect):
+        draw_chrome(screen, draw_rect, self.colour, self.border_colour, self.border_size)
+        profiler = self.get_root().profiler
+        for element in self.elements:
+            if element.visible:
+                if profiler: profiler.time_draw(element, screen)
+                else: element.draw(screen)
 
     def draw(self, screen):
         if not self.visible: return
-        window_pos = self.window.get_position()
+        window_pos = self.window.get_draw_offset()
         draw_rect = (self.hitbox.x + window_pos[0], self.hitbox.y + window_pos[1], self.hitbox.width, self.hitbox.height)
-        pygame.draw.rect(screen, self.colour, draw_rect)
-        pygame.draw.rect(screen, self.border_colour, draw_rect, self.border_size)
-        for element in self.elements:
-            if element.visible:
-                element.draw(screen)
+        if self.cached:
+            if self.cache_dirty or self.cache_surface is None: self.render_cache()
+            screen.blit(self.cache_surface, draw_rect)
 
-class SelectionBox(Element):
+        else:
+            self.draw_contents(screen, draw_rect)
 
-    def __init__(self, window, position, dimensions, options, amount_selecatable, colour=(250, 250, 250), border_size = 2, border_colour=(100, 100, 100), text_size = 32, text_colour = (0, 0, 0), bold = False, italic = False, font = None) -> None:
-        super().__init__(window, position, dimensions, colour, None, border_size, border_colour, True)
-        self.text_size = text_size
-        self.text_colour = text_colour
-        self.bold = bold
-        self.italic = italic
-        self.font = font
+class Layout(Frame):
 
-        self.options = options
-        self.amount_selecatable = amount_selecatable
+    def __init__(self, window, position, dimensions, padding = 0, spacing = 0, stretch = True, fill = False, colour = None, border_size = 0, border_colour = (100, 100, 100), cached = False) -> None:
+        if fill: position, dimensions = (0, 0), (window.width, window.height)
+        self.padding = padding
+        self.spacing = spacing
+        self.stretch = stretch
+        self.fill = fill
+        self.weights = {}
+        self.measured = None
+        self.layout_dirty = False
+        super().__init__(window, position, dimensions, colour, border_size, border_colour, False, cached)
 
-    def check_event(self, event):
-        if not self.visible: return
+        self.depth = 0
+        parent = self.window
+        while parent is not self.root:
+            self.depth += 1
+            parent = parent.window
 
-    def draw(self, screen):
-        if not self.visible: return
+        self.invalidate_layout()
+
+    def add_element(self, element):
+        super().add_element(element)
+        self.child_resized(element)
+
+    def set_weight(self, element, weight):
+        self.weights[element] = weight
+        self.invalidate_layout()
+
+    def get_children(self):
+        return [element for element in self.elements if element.visible]
+
+    def get_preferred_size(self, element):
+        if isinstance(element, Layout) and not element.fill: return element.measure()
+        return element.preferred_size
+
+    def child_resized(self, element):
+        self.invalidate_layout()
+        if self.measured is None: return
+        self.measured = None
+        self.window.child_resized(self)
+
+    def resized(self, dw, dh):
+        super().resized(dw, dh)
+        self.invalidate_layout()
+
+    def invalidate_layout(self):
+        if self.layout_dirty: return
+        self.layout_dirty = True
+        self.root.queue_layout(self)
+
+    def measure(self):
+        if self.measured is None:
+            width, height = self.measure_children([self.get_preferred_size(element) for element in self.get_children()])
+            self.measured = (width + 2*(self.padding + self.border_size), height + 2*(self.padding + self.border_size))
+
+        return self.measured
+
+    def measure_children(self, sizes):
+        return (0, 0)
+
+    def get_content_rect(self):
+        inset = self.padding + self.border_size
+        return (inset, inset, max(0, self.width - 2*inset), max(0, self.height - 2*inset))
+
+    def place(self, element, position, size):
+        position, size = (int(position[0]), int(position[1])), (max(0, int(size[0])), max(0, int(size[1])))
+        if size != (element.width, element.height): element.set_dimensions(size)
+        if position != (element.x, element.y): element.set_position(position)
+
+    def arrange(self):
+        self.layout_dirty = False
+
+class BoxLayout(Layout):
+
+    def measure_children(self, sizes):
+        if not sizes: return (0, 0)
+        main = sum(size[self.axis] for size in sizes) + self.spacing * (len(sizes) - 1)
+        cross = max(size[1 - self.axis] for size in sizes)
+        return (main, cross) if self.axis == 0 else (cross, main)
+
+    def arrange(self):
+        super().arrange()
+        children = self.get_children()
+        if not children: return
+        content = self.get_content_rect()
+        sizes = [self.get_preferred_size(element) for element in children]
+        weights = [self.weights.get(element, 0) for element in children]
+        total_weight = sum(weights)
+        extra = content[2 + self.axis] - sum(size[self.axis] for size in sizes) - self.spacing * (len(children) - 1)
+        if extra < 0 or not total_weight: extra = 0
+
+        offset = content[self.axis]
+        for element, size, weight in zip(children, sizes, weights):
+            start = round(offset)
+            offset += size[self.axis] + (extra * weight / total_weight if total_weight else 0)
+            main = round(offset) - start
+            cross = content[3 - self.axis] if self.stretch else size[1 - self.axis]
+            if self.axis == 0: self.place(element, (start, content[1]), (main, cross))
+            else: self.place(element, (content[0], start), (cross, main))
+            offset += self.spacing
+
+class RowLayout(BoxLayout):
+
+    axis = 0
+
+class ColumnLayout(BoxLayout):
+
+    axis = 1
+
+class GridLayout(Layout):
+
+    def __init__(self, window, position, dimensions, columns = 2, padding = 0, spacing = 0, stretch = True, fill = False, colour = None, border_size = 0, border_colour = (100, 100, 100), cached = False) -> None:
+        self.columns = max(1, columns)
+        super().__init__(window, position, dimensions, padding, spacing, stretch, fill, colour, border_size, border_colour, cached)
+
+    def get_tracks(self, sizes):
+        column_widths = [0] * min(self.columns, len(sizes))
+        row_heights = [0] * -(-len(sizes) // self.columns)
+        for index, size in enumerate(sizes):
+            row, column = divmod(index, self.columns)
+            column_widths[column] = max(column_widths[column], size[0])
+            row_heights[row] = max(row_heights[row], size[1])
+
+        return column_widths, row_heights
+
+    def measure_children(self, sizes):
+        if not sizes: return (0, 0)
+        column_widths, row_heights = self.get_tracks(sizes)
+        return (sum(column_widths) + self.spacing * (len(column_widths) - 1), sum(row_heights) + self.spacing * (len(row_heights) - 1))
+
+    def stretch_tracks(self, tracks, available):
+        extra = available - sum(tracks) - self.spacing * (len(tracks) - 1)
+        if not self.stretch or extra <= 0: return tracks
+        return [track + extra / len(tracks) for track in tracks]
+
+    def arrange(self):
+        super().arrange()
+        children = self.get_children()
+        if not children: return
+        content = self.get_content_rect()
+        sizes = [self.get_preferred_size(element) for element in children]
+        column_widths, row_heights = self.get_tracks(sizes)
+        column_widths = self.stretch_tracks(column_widths, content[2])
+        row_heights = self.stretch_tracks(row_heights, content[3])
+
+        column_starts = list(itertools.accumulate([content[0]] + [width + self.spacing for width in column_widths]))
+        row_starts = list(itertools.accumulate([content[1]] + [height + self.spacing for height in row_heights]))
+        for index, (element, size) in enumerate(zip(children, sizes)):
+            row, column = divmod(index, self.columns)
+            x, y = round(column_starts[column]), round(row_starts[row])
+            if self.stretch: size = (round(column_starts[column] + column_widths[column]) - x, round(row_starts[row] + row_heights[row]) - y)
+            self.place(element, (x, y), size)
 
 class DropDown(Element):
 
-    #MAYBE ADD SCROLLBAR
+    __slots__ = ("options", "default_option", "current_option", "pygame_font", "max_visible", "selected_colour", "scrollbar_width", "scrollbar_colour", "scroll", "highlighted", "dragging_scrollbar", "prefix_keys", "prefix_indices", "filter_text", "filter_ranges", "filtered")
 
-    def __init__(self, window, position, dimensions, options, default_option = "Pick", colour=(250, 250, 250), border_size = 2, border_colour=(100, 100, 100), text_size = 32, text_colour = (0, 0, 0), bold = False, italic = False, font = None) -> None:
-        super().__init__(window, position, dimensions, colour, None, border_size, border_colour, True)
+    def __init__(self, window, position, dimensions, options, default_option = "Pick", colour=(250, 250, 250), border_size = 2, border_colour=(100, 100, 100), text_size = 32, text_colour = (0, 0, 0), bold = False, italic = False, font = None, max_visible = 8, selected_colour = (200, 200, 255), scrollbar_width = 12, scrollbar_colour = (160, 160, 160)) -> None:
+        super().__init__(window, position, dimensions, colour, None, border_size, border_colour, True, Style.get(colour, None, border_colour, border_size, text_colour, text_size, bold, italic, font))
         self.options = options
-        self.option_rects = {}
         self.default_option = default_option
         self.current_option = None
+        self.focusable = True
 
-        self.text_size = text_size
-        self.text_colour = text_colour
-        self.bold = bold
-        self.italic = italic
-        self.font = font
+        self.pygame_font = font_registry.get(self.font, self.text_size, self.bold, self.italic)
 
-        self.pygame_font = pygame.font.SysFont(self.font, self.text_size, self.bold, self.italic)
-        self.rest_rect = None
+        self.max_visible = max_visible
+        self.selected_colour = selected_colour
+        self.scrollbar_width = scrollbar_width
+        self.scrollbar_colour = scrollbar_colour
+        self.scroll = 0
+        self.highlighted = None
+        self.dragging_scrollbar = False
 
-        self.generate_rects()
+        self.prefix_keys = None
+        self.prefix_indices = None
+        self.filter_text = ""
+        self.filter_ranges = []
+        self.filtered = None
 
     def get(self):
         return self.current_option
 
-    def generate_rects(self):
-        for index, option in enumerate(self.options):
+    def set_options(self, options):
+        self.close()
+        self.mark_dirty()
+        self.options = options
+        self.prefix_keys = self.prefix_indices = None
+        if self.current_option not in options: self.current_option = None
+
+    def build_prefix_index(self):
+        keys = [str(option).lower() for option in self.options]
+        self.prefix_indices = sorted(range(len(keys)), key=keys.__getitem__)
+        self.prefix_keys = [keys[index] for index in self.prefix_indices]
+
+    def set_filter(self, text):
+        text = text.lower()
+        if text == self.filter_text: return
+        self.mark_dirty()
+        while self.filter_ranges and not text.startswith(self.filter_ranges[-1][0]):
+            self.filter_ranges.pop()
+
+        if text:
+            if self.prefix_keys is None: self.build_prefix_index()
+            lo, hi = self.filter_ranges[-1][1:] if self.filter_ranges else (0, len(self.prefix_keys))
+            lo = bisect.bisect_left(self.prefix_keys, text, lo, hi)
+            hi = bisect.bisect_left(self.prefix_keys, text[:-1] + chr(ord(text[-1]) + 1), lo, hi)
+            self.filter_ranges.append((text, lo, hi))
+            self.filtered = sorted(self.prefix_indices[lo:hi])
+
+        else:
+            self.filtered = None
+
+        self.filter_text = text
+        self.scroll = 0
+        self.highlighted = 0 if text and self.filtered else None
+        self.mark_dirty()
+
+    def get_count(self):
+        return len(self.options) if self.filtered is None else len(self.filtered)
+
+    def get_option(self, position):
+        return self.options[position if self.filtered is None else self.filtered[position]]
+
+    def get_visible_rows(self):
+        return min(self.max_visible, self.get_count())
+
+    def get_max_scroll(self):
+        return self.get_count() - self.get_visible_rows()
+
+    def set_scroll(self, scroll):
+        scroll = min(max(scroll, 0), self.get_max_scroll())
+        if scroll == self.scroll: return
+        self.scroll = scroll
+        self.mark_dirty()
+
+    def scroll_to(self, position):
+        if position < self.scroll: self.set_scroll(position)
+        elif position >= self.scroll + self.get_visible_rows(): self.set_scroll(position - self.get_visible_rows() + 1)
+
+    def get_popup_rect(self):
+        return pygame.Rect(self.x, self.y + self.height, self.width, (self.get_visible_rows() + 1) * self.height)
+
+    def get_thumb_rect(self):
+        track = self.get_visible_rows() * self.height
+        thumb = max(self.scrollbar_width, track * self.get_visible_rows() // self.get_count())
+        top = self.y + self.height + (track - thumb) * self.scroll // self.get_max_scroll()
+        return pygame.Rect(self.x + self.width - self.scrollbar_width, top, self.scrollbar_width, thumb)
+
+    def get_dirty_rect(self):
+        rect = self.get_rect()
+        if self.selected:
+            rect.union_ip(self.get_popup_rect().move(self.window.get_position()))
+
+        return rect
+
+    def open(self):
+        if self.selected: return
+        self.selected = True
+        self.focus()
+        self.window.capture_mouse(self)
+        self.mark_dirty()
+
+    def close(self):
+        if not self.selected: return
+        self.mark_dirty()
+        self.selected = False
+        self.dragging_scrollbar = False
+        self.filter_text = ""
+        self.filter_ranges = []
+        self.filtered = None
+        self.scroll = 0
+        self.highlighted = None
+        self.mark_dirty()
+
+    def choose(self, option):
+        self.current_option = option
+        self.close()
+
+    def set_focused(self, focused):
+        if not focused: self.close()
+
+    def drag_scrollbar(self, mousey):
+        thumb = self.get_thumb_rect()
+        track = self.get_visible_rows() * self.height - thumb.height
+        fraction = (mousey - self.y - self.height - thumb.height / 2) / track if track > 0 else 0
+        self.set_scroll(round(fraction * self.get_max_scroll()))
+
+    def click_popup(self, mousex, mousey):
+        if not self.get_popup_rect().collidepoint(mousex, mousey):
+            self.close()
+            self.blur()
+            return
+
+        row = (mousey - self.y) // self.height - 1
+        if row >= self.get_visible_rows(): self.choose(None)
+        elif self.get_max_scroll() and mousex >= self.x + self.width - self.scrollbar_width:
+            self.dragging_scrollbar = True
+            self.drag_scrollbar(mousey)
+
+        else:
+            self.choose(self.get_option(self.scroll + row))
+
+    def handle_key(self, event):
+        if event.key == pygame.K_ESCAPE:
+            self.close()
+
+        elif event.key == pygame.K_RETURN:
+            if not self.selected: self.open()
+            elif self.highlighted is not None: self.choose(self.get_option(self.highlighted))
 
-            rect = (self.x, self.y + (index + 1) * self.height, self.width, self.height)
-            self.option_rects[rect] = option
+        elif event.key in (pygame.K_UP, pygame.K_DOWN):
+            if not self.selected: self.open()
+            elif self.get_count():
+                step = -1 if event.key == pygame.K_UP else 1
+                self.highlighted = 0 if self.highlighted is None else min(max(self.highlighted + step, 0), self.get_count() - 1)
+                self.scroll_to(self.highlighted)
+                self.mark_dirty()
 
-        self.rest_rect = pygame.Rect(self.x, self.y + (len(self.options) + 1) * self.height, self.width, self.height)
+        elif event.key == pygame.K_BACKSPACE:
+            self.set_filter(self.filter_text[:-1])
+
+        elif event.unicode and event.unicode.isprintable():
+            self.open()
+            self.set_filter(self.filter_text + event.unicode)
 
     def check_event(self, event):
         if not self.visible: return
-        mousex, mousey = pygame.mouse.get_pos()
+        mousex, mousey = self.get_root().get_mouse_pos()
         window_pos = self.window.get_position()
         mousex -= window_pos[0]
         mousey -= window_pos[1]
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             if self.hitbox.collidepoint(mousex, mousey):
-                self.selected = not self.selected
+                if self.selected: self.close()
+                else: self.open()
 
             elif self.selected:
-                for option_rect, option in self.option_rects.items():
-                    rect = pygame.Rect(*option_rect)
-                    if rect.collidepoint(mousex, mousey):
-                        self.current_option = option
-                        self.selected = False
-                        break
+                self.click_popup(mousex, mousey)
 
-                if self.rest_rect.collidepoint(mousex, mousey):
-                    self.current_option = None
-                    self.selected = False
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.dragging_scrollbar = False
 
-            else:
-                self.selected = False
+        elif event.type == pygame.MOUSEMOTION and self.dragging_scrollbar:
+            self.drag_scrollbar(mousey)
+
+        elif event.type == pygame.MOUSEWHEEL and self.selected:
+            self.set_scroll(self.scroll - 3 * event.y)
+
+        elif event.type == pygame.KEYDOWN and self.get_root().focused is self:
+            self.handle_key(event)
 
     def draw(self, screen):
         if not self.visible: return
-        window_pos = self.window.get_position()
+        window_pos = self.window.get_draw_offset()
         draw_rect = (self.hitbox.x + window_pos[0], self.hitbox.y + window_pos[1], self.hitbox.width, self.hitbox.height)
-        pygame.draw.rect(screen, self.colour, draw_rect)
-        pygame.draw.rect(screen, self.border_colour, draw_rect, self.border_size)
-        opt = self.current_option if self.current_option else self.default_option
-        screen.blit(self.pygame_font.render(opt, True, self.text_colour), (draw_rect[0] + 5, draw_rect[1] + 5))
+        draw_chrome(screen, draw_rect, self.colour, self.border_colour, self.border_size)
+        if self.selected and self.filter_text: header = self.pygame_font.render(self.filter_text + "|", True, self.text_colour)
+        else: header = text_cache.render(self.pygame_font, str(self.current_option if self.current_option else self.default_option), True, self.text_colour)
+        screen.blit(header, (draw_rect[0] + 5, draw_rect[1] + 5))
 
         if self.selected:
-            for option_rect, option in self.option_rects.items():
-                draw_rect = (option_rect[0] + window_pos[0], option_rect[1] + window_pos[1], option_rect[2], option_rect[3])
-                pygame.draw.rect(screen, self.colour, draw_rect)
-                pygame.draw.rect(screen, self.border_colour, draw_rect, self.border_size)
-                screen.blit(self.pygame_font.render(option, True, self.text_colour), (draw_rect[0] + 5, draw_rect[1] + 5))
+            rows = self.get_visible_rows()
+            for row in range(rows):
+                position = self.scroll + row
+                row_rect = (draw_rect[0], draw_rect[1] + (row + 1) * self.height, self.width, self.height)
+                draw_chrome(screen, row_rect, self.selected_colour if position == self.highlighted else self.colour, self.border_colour, self.border_size)
+                screen.blit(text_cache.render(self.pygame_font, str(self.get_option(position)), True, self.text_colour), (row_rect[0] + 5, row_rect[1] + 5))
+
+            row_rect = (draw_rect[0], draw_rect[1] + (rows + 1) * self.height, self.width, self.height)
+            draw_chrome(screen, row_rect, self.colour, self.border_colour, self.border_size)
+            screen.blit(text_cache.render(self.pygame_font, "None", True, self.text_colour), (row_rect[0] + 5, row_rect[1] + 5))
+
+            if self.get_max_scroll():
+                pygame.draw.rect(screen, self.scrollbar_colour, self.get_thumb_rect().move(window_pos))
+
+class VirtualList(Element):
+
+    __slots__ = ("items", "row_provider", "row_count", "function", "selected_colour", "pygame_font", "row_height", "row_surfaces", "scroll_offset", "selected_row", "scrollbar")
+
+    def __init__(self, window, position, dimensions, items = None, row_provider = None, row_count = 0, row_height = None, scrollbar = None, function = None, colour=(250, 250, 250), border_size = 2, border_colour=(100, 100, 100), text_size = 32, text_colour = (0, 0, 0), selected_colour = (200, 200, 255), bold = False, italic = False, font = None) -> None:
+        super().__init__(window, position, dimensions, colour, None, border_size, border_colour, True, Style.get(colour, None, border_colour, border_size, text_colour, text_size, bold, italic, font))
+        self.items = items
+        self.row_provider = row_provider
+        self.row_count = row_count
+        self.function = function
+        self.selected_colour = selected_colour
+
+        self.pygame_font = font_registry.get(self.font, self.text_size, self.bold, self.italic)
+        self.row_height = row_height if row_height else self.pygame_font.get_linesize()
+        self.row_surfaces = {}
+        self.scroll_offset = 0
+        self.selected_row = None
+
+        self.scrollbar = scrollbar
+        if self.scrollbar: self.scrollbar.link(self)
+
+    def get_count(self):
+        return len(self.items) if self.items is not None else self.row_count
+
+    def get_row(self, index):
+        return self.items[index] if self.items is not None else self.row_provider(index)
+
+    def get(self):
+        return self.get_row(self.selected_row) if self.selected_row is not None else None
+
+    def is_row_selected(self, index):
+        return index == self.selected_row
+
+    def set_items(self, items):
+        self.items = items
+        self.refresh()
+
+    def set_row_count(self, row_count):
+        self.row_count = row_count
+        self.refresh()
+
+    def refresh(self):
+        self.row_surfaces = {}
+        if self.selected_row is not None and self.selected_row >= self.get_count(): self.selected_row = None
+        self.mark_dirty()
+
+    def get_view_height(self):
+        return self.height - 2 * self.border_size
+
+    def get_max_offset(self):
+        return max(0, self.get_count() * self.row_height - self.get_view_height())
+
+    def get_offset(self):
+        if self.scrollbar: return round(self.scrollbar.get_y() * self.get_max_offset())
+        return min(self.scroll_offset, self.get_max_offset())
 
-            draw_rect = (self.rest_rect.x + window_pos[0], self.rest_rect.y + window_pos[1], self.rest_rect.width, self.rest_rect.height)
-            pygame.draw.rect(screen, self.colour, draw_rect)
-            pygame.draw.rect(screen, self.border_colour, draw_rect, self.border_size)
-            screen.blit(self.pygame_font.render("None", True, self.text_colour), (draw_rect[0] + 5, draw_rect[1] + 5))
+    def set_offset(self, offset):
+        max_offset = self.get_max_offset()
+        offset = min(max(offset, 0), max_offset)
+        if self.scrollbar:
+            self.scrollbar.set_y(offset / max_offset if max_offset else 0)
+
+        elif offset != self.scroll_offset:
+            self.scroll_offset = offset
+            self.mark_dirty()
+
+    def scroll_to(self, index):
+        offset = self.get_offset()
+        top = index * self.row_height
+        if top < offset: self.set_offset(top)
+        elif top + self.row_height > offset + self.get_view_height(): self.set_offset(top + self.row_height - self.get_view_height())
+
+    def get_visible_range(self):
+        offset = self.get_offset()
+        first = offset // self.row_height
+        last = min(self.get_count(), (offset + self.get_view_height()) // self.row_height + 1)
+        return first, last
+
+    def check_event(self, event):
+        if not self.visible: return
+        mousex, mousey = self.get_root().get_mouse_pos()
+        window_pos = self.window.get_position()
+        mousex -= window_pos[0]
+        mousey -= window_pos[1]
+        if not self.hitbox.collidepoint(mousex, mousey): return
+        if event.type == pygame.MOUSEWHEEL:
+            self.set_offset(self.get_offset() - 3 * self.row_height * event.y)
+
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            index = (mousey - self.y - self.border_size + self.get_offset()) // self.row_height
+            if 0 <= index < self.get_count():
+                self.selected_row = index
+                self.mark_dirty()
+                if self.function: self.function(index, self.get_row(index))
+
+    def draw(self, screen):
+        if not self.visible: return
+        window_pos = self.window.get_draw_offset()
+        draw_rect = pygame.Rect(self.hitbox.x + window_pos[0], self.hitbox.y + window_pos[1], self.hitbox.width, self.hitbox.height)
+        draw_chrome(screen, draw_rect, self.colour, self.border_colour, self.border_size)
+
+        view_rect = draw_rect.inflate(-2 * self.border_size, -2 * self.border_size)
+        clip = screen.get_clip()
+        screen.set_clip(view_rect.clip(clip))
+
+        offset = self.get_offset()
+        first, last = self.get_visible_range()
+        row_surfaces = {}
+        for index in range(first, last):
+            surface = self.row_surfaces.get(index)
+            if surface is None: surface = self.pygame_font.render(str(self.get_row(index)), True, self.text_colour)
+            row_surfaces[index] = surface
+
+            row_y = view_rect.y + index * self.row_height - offset
+            if self.is_row_selected(index): pygame.draw.rect(screen, self.selected_colour, (view_rect.x, row_y, view_rect.width, self.row_height))
+            screen.blit(surface, (view_rect.x + 5, row_y))
+
+        self.row_surfaces = row_surfaces
+        screen.set_clip(clip)
+
+class SelectionBox(VirtualList):
+
+    __slots__ = ("options", "amount_selecatable", "on_change", "bits", "selected_count", "anchor")
+
+    def __init__(self, window, position, dimensions, options, amount_selecatable = None, colour=(250, 250, 250), border_size = 2, border_colour=(100, 100, 100), text_size = 32, text_colour = (0, 0, 0), bold = False, italic = False, font = None, row_height = None, scrollbar = None, selected_colour = (200, 200, 255), function = None) -> None:
+        super().__init__(window, position, dimensions, options, None, 0, row_height, scrollbar, None, colour, border_size, border_colour, text_size, text_colour, selected_colour, bold, italic, font)
+        self.options = options
+        self.amount_selecatable = amount_selecatable
+        self.on_change = function
+        self.focusable = True
+        self.bits = bytearray((len(options) + 7) // 8)
+        self.selected_count = 0
+        self.anchor = None
+
+    def set_items(self, items):
+        self.options = items
+        self.bits = bytearray((len(items) + 7) // 8)
+        self.selected_count = 0
+        self.anchor = None
+        super().set_items(items)
+
+    def is_row_selected(self, index):
+        return self.bits[index >> 3] >> (index & 7) & 1
+
+    def get_capacity(self):
+        if self.amount_selecatable is None: return self.get_count()
+        return self.amount_selecatable - self.selected_count
+
+    def get_selected_indices(self):
+        indices = []
+        for byte_index, byte in enumerate(self.bits):
+            if not byte: continue
+            base = byte_index << 3
+            indices.extend(base + bit for bit in range(8) if byte >> bit & 1)
+
+        return indices
+
+    def get(self):
+        return [self.options[index] for index in self.get_selected_indices()]
+
+    def changed(self):
+        self.mark_dirty()
+        if self.on_change: self.on_change(self.get_selected_indices())
+
+    def set_selected(self, index, selected):
+        if bool(self.is_row_selected(index)) == selected: return False
+        if selected and self.get_capacity() <= 0: return False
+        self.bits[index >> 3] ^= 1 << (index & 7)
+        self.selected_count += 1 if selected else -1
+        return True
+
+    def toggle(self, index):
+        if self.set_selected(index, not self.is_row_selected(index)): self.changed()
+
+    def count_bits(self, first, last):
+        return int.from_bytes(self.bits[first:last], "little").bit_count()
+
+    def count_range(self, start, stop):
+        bits = int.from_bytes(self.bits[start >> 3:((stop - 1) >> 3) + 1], "little") >> (start & 7)
+        return (bits & ((1 << (stop - start)) - 1)).bit_count()
+
+    def set_range_bits(self, start, stop, selected):
+        first, last = start >> 3, (stop - 1) >> 3
+        before = self.count_bits(first, last + 1)
+        head = (0xff << (start & 7)) & 0xff
+        tail = 0xff >> (7 - ((stop - 1) & 7))
+        if first == last: masks = [(first, head & tail)]
+        else:
+            fill = 0xff if selected else 0
+            self.bits[first + 1:last] = bytes([fill]) * (last - first - 1)
+            masks = [(first, head), (last, tail)]
+
+        for byte_index, mask in masks:
+            if selected: self.bits[byte_index] |= mask
+            else: self.bits[byte_index] &= ~mask & 0xff
+
+        self.selected_count += self.count_bits(first, last + 1) - before
+
+    def select_range(self, start, stop, selected = True):
+        start, stop = max(0, min(start, stop)), min(self.get_count(), max(start, stop) + 1)
+        if start >= stop: return
+        if not selected or self.amount_selecatable is None or stop - start - self.count_range(start, stop) <= self.get_capacity():
+            self.set_range_bits(start, stop, selected)
+
+        else:
+            for index in range(start, stop):
+                if self.get_capacity() <= 0: break
+                self.set_selected(index, True)
+
+        self.changed()
+
+    def select_all(self):
+        self.select_range(0, self.get_count() - 1)
+
+    def select_none(self):
+        if not self.selected_count: return
+        self.bits = bytearray(len(self.bits))
+        self.selected_count = 0
+        self.changed()
+
+    def check_event(self, event):
+        if not self.visible: return
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_a and event.mod & pygame.KMOD_CTRL:
+            if event.mod & pygame.KMOD_SHIFT: self.select_none()
+            else: self.select_all()
+            return
+
+        if event.type != pygame.MOUSEBUTTONDOWN or event.button != 1: return super().check_event(event)
+        mousex, mousey = self.get_root().get_mouse_pos()
+        window_pos = self.window.get_position()
+        mousex -= window_pos[0]
+        mousey -= window_pos[1]
+        if not self.hitbox.collidepoint(mousex, mousey): return
+        self.focus()
+        index = (mousey - self.y - self.border_size + self.get_offset()) // self.row_height
+        if not 0 <= index < self.get_count(): return
+        if self.anchor is not None and self.get_root().get_key_mods() & pygame.KMOD_SHIFT: self.select_range(self.anchor, index)
+        else: self.toggle(index)
+        self.anchor = index
+
+class LogView(Element):
+
+    __slots__ = ("capacity", "buffer", "total", "pending", "pending_count", "flush_scheduled", "lock", "scrollbar", "scroll_fraction", "follow", "paused_first", "pygame_font", "row_height", "surface", "surface_key", "rendered_first", "rendered_count")
+
+    def __init__(self, window, position, dimensions, capacity = 10000, scrollbar = None, colour=(250, 250, 250), border_size = 2, border_colour=(100, 100, 100), text_size = 20, text_colour = (0, 0, 0), bold = False, italic = False, font = None, row_height = None) -> None:
+        super().__init__(window, position, dimensions, colour, None, border_size, border_colour, True, Style.get(colour, None, border_colour, border_size, text_colour, text_size, bold, italic, font))
+        self.capacity = capacity
+        self.buffer = [None] * capacity
+        self.total = 0
+        self.pending = deque(maxlen=capacity)
+        self.pending_count = 0
+        self.flush_scheduled = False
+        self.lock = threading.Lock()
+
+        self.pygame_font = font_registry.get(self.font, self.text_size, self.bold, self.italic)
+        self.row_height = row_height if row_height else self.pygame_font.get_linesize()
+        self.surface = None
+        self.surface_key = None
+        self.rendered_first = 0
+        self.rendered_count = 0
+
+        self.follow = True
+        self.paused_first = 0
+        self.scroll_fraction = 1
+        self.scrollbar = scrollbar
+        if self.scrollbar:
+            self.scrollbar.link(self)
+            self.scrollbar.set_y(1)
+
+    def append(self, text):
+        lines = text.split("\n")
+        with self.lock:
+            self.pending.extend(lines)
+            self.pending_count += len(lines)
+            if self.flush_scheduled: return
+            self.flush_scheduled = True
+
+        self.root.call_soon_threadsafe(self.flush)
+
+    def flush(self):
+        with self.lock:
+            lines, count = list(self.pending), self.pending_count
+            self.pending.clear()
+            self.pending_count = 0
+            self.flush_scheduled = False
+
+        self.total += count - len(lines)
+        for line in lines:
+            self.buffer[self.total % self.capacity] = line
+            self.total += 1
+
+        self.sync_scrollbar()
+        self.mark_dirty()
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.pending_count = 0
+
+        self.buffer = [None] * self.capacity
+        self.total = 0
+        self.follow = True
+        self.surface = None
+        self.sync_scrollbar()
+        self.mark_dirty()
+
+    def get_lines(self):
+        first_available, _ = self.get_line_range()
+        return [self.buffer[line % self.capacity] for line in range(first_available, self.total)]
+
+    def get_visible_rows(self):
+        return max(1, (self.height - 2 * self.border_size) // self.row_height)
+
+    def get_line_range(self):
+        first_available = max(0, self.total - self.capacity)
+        return first_available, max(first_available, self.total - self.get_visible_rows())
+
+    def sync_from_scrollbar(self):
+        if not self.scrollbar: return
+        fraction = self.scrollbar.get_y()
+        if abs(fraction - self.scroll_fraction) < 1e-6: return
+        self.scroll_fraction = fraction
+        first_available, max_first = self.get_line_range()
+        self.follow = fraction >= 1
+        self.paused_first = first_available + round(fraction * (max_first - first_available))
+
+    def sync_scrollbar(self):
+        if not self.scrollbar: return
+        first_available, max_first = self.get_line_range()
+        first = self.get_first_line()
+        self.scrollbar.set_y((first - first_available) / (max_first - first_available) if max_first > first_available else 1)
+        self.scroll_fraction = self.scrollbar.get_y()
+
+    def get_first_line(self):
+        self.sync_from_scrollbar()
+        first_available, max_first = self.get_line_range()
+        if self.follow: return max_first
+        return min(max(self.paused_first, first_available), max_first)
+
+    def set_first_line(self, first):
+        first_available, max_first = self.get_line_range()
+        first = min(max(first, first_available), max_first)
+        self.follow = first >= max_first
+        self.paused_first = first
+        self.sync_scrollbar()
+        self.mark_dirty()
+
+    def resized(self, dw, dh):
+        self.surface = None
+
+    def check_event(self, event):
+        if not self.visible or event.type != pygame.MOUSEWHEEL: return
+        mousex, mousey = self.get_root().get_mouse_pos()
+        window_pos = self.window.get_position()
+        if self.hitbox.collidepoint(mousex - window_pos[0], mousey - window_pos[1]):
+            self.set_first_line(self.get_first_line() - 3 * event.y)
+
+    def update_surface(self, size):
+        first = self.get_first_line()
+        count = min(self.get_visible_rows(), self.total - first)
+        key = (self.colour, self.text_colour, self.pygame_font)
+        if self.surface is None or self.surface.get_size() != size or self.surface_key != key:
+            self.surface = pygame.Surface(size)
+            self.surface.fill(self.colour)
+            self.surface_key = key
+            self.rendered_count = 0
+
+        shift = first - self.rendered_first
+        if abs(shift) >= self.get_visible_rows():
+            self.surface.fill(self.colour)
+            self.rendered_count = 0
+
+        elif shift:
+            self.surface.scroll(0, -shift * self.row_height)
+
+        keep_start, keep_end = max(first, self.rendered_first), min(first + count, self.rendered_first + self.rendered_count)
+        for line in range(first, first + count):
+            if keep_start <= line < keep_end: continue
+            row_rect = (0, (line - first) * self.row_height, size[0], self.row_height)
+            self.surface.fill(self.colour, row_rect)
+            self.surface.blit(self.pygame_font.render(self.buffer[line % self.capacity], True, self.text_colour, self.colour), (5, row_rect[1]))
+
+        if shift or self.rendered_count > count:
+            self.surface.fill(self.colour, (0, count * self.row_height, size[0], size[1] - count * self.row_height))
+
+        self.rendered_first, self.rendered_count = first, count
+
+    def draw(self, screen):
+        if not self.visible: return
+        window_pos = self.window.get_draw_offset()
+        draw_rect = pygame.Rect(self.hitbox.x + window_pos[0], self.hitbox.y + window_pos[1], self.hitbox.width, self.hitbox.height)
+        draw_chrome(screen, draw_rect, self.colour, self.border_colour, self.border_size)
+        view_rect = draw_rect.inflate(-2 * self.border_size, -2 * self.border_size)
+        if view_rect.width <= 0 or view_rect.height <= 0: return
+        self.update_surface(view_rect.size)
+        screen.blit(self.surface, view_rect)
 
 class ImageBox(Element):
 
-    def __init__(self, window, position, dimensions, image_filename, border_size = 2, border_colour=(100, 100, 100)) -> None:
+    __slots__ = ("image_filename", "image_size", "placeholder_colour", "image")
+
+    def __init__(self, window, position, dimensions, image_filename, border_size = 2, border_colour=(100, 100, 100), asynchronous = True, placeholder_colour = (200, 200, 200)) -> None:
         super().__init__(window, position, dimensions, (0, 0, 0), None, border_size, border_colour, False)
         self.image_filename = image_filename
-        self.image = pygame.image.load(self.image_filename)
-        self.image = pygame.transform.scale(self.image, (self.width - self.border_size, self.height - self.border_size))
+        self.image_size = (self.width - self.border_size, self.height - self.border_size)
+        self.placeholder_colour = placeholder_colour
+        if asynchronous and not self.root.headless:
+            self.image = image_cache.request(self.image_filename, self.image_size)
+            if self.image is None and not image_cache.has_failed(self.image_filename): self.get_root().request_frames(self)
+
+        else:
+            self.image = image_cache.get(self.image_filename, self.image_size)
+
+    def resized(self, dw, dh):
+        self.image_size = (self.width - self.border_size, self.height - self.border_size)
+        if self.root.headless:
+            self.image = image_cache.get(self.image_filename, self.image_size)
+            return
+
+        self.image = image_cache.request(self.image_filename, self.image_size)
+        if self.image is None and not image_cache.has_failed(self.image_filename): self.get_root().request_frames(self)
+        else: self.get_root().release_frames(self)
 
     def draw(self, screen):
         if not self.visible: return
-        window_pos = self.window.get_position()
+        window_pos = self.window.get_draw_offset()
         draw_rect = (self.x + window_pos[0], self.y + window_pos[1], self.hitbox.width, self.hitbox.height)
-        pygame.draw.rect(screen, self.border_colour, draw_rect, self.border_size)
-        screen.blit(self.image, draw_rect)
+        if self.image is None:
+            self.image = image_cache.poll(self.image_filename, self.image_size)
+            if self.image is not None or image_cache.has_failed(self.image_filename): self.get_root().release_frames(self)
+
+        draw_chrome(screen, draw_rect, None, self.border_colour, self.border_size)
+        if self.image is None: pygame.draw.rect(screen, self.placeholder_colour, (draw_rect[0] + self.border_size, draw_rect[1] + self.border_size, self.image_size[0] - self.border_size, self.image_size[1] - self.border_size))
+        else: screen.blit(self.image, draw_rect)
         
-class Window:
+class Window(Container):
 
-    def __init__(self, width = 0, height = 0, fullscreen = False, colour = (200, 200, 200), fps = 60) -> None:
-        self.window = pygame.display.set_mode((width, height), pygame.FULLSCREEN if fullscreen else pygame.SHOWN)
+    def __init__(self, width = 0, height = 0, fullscreen = False, colour = (200, 200, 200), fps = 60, dirty_rendering = False, idle = False, tab_navigation = True, profile = False, resizable = False, headless = False) -> None:
+        self.headless = headless
+        if headless: self.window = pygame.Surface((width, height))
+        else: self.window = pygame.display.set_mode((width, height), pygame.FULLSCREEN if fullscreen else pygame.RESIZABLE if resizable else pygame.SHOWN)
         self.width, self.height = self.window.get_size()
         self.x = 0
         self.y = 0
@@ -645,81 +2439,510 @@ class Window:
 
         self.running = True
         self.keybinds = {}
-        self.elements = []
+        self.init_container()
+
+        self.focused = None
+        self.tab_navigation = tab_navigation
+        self.mouse_pos = (0, 0) if headless else pygame.mouse.get_pos()
+        self.key_mods = 0 if headless else pygame.key.get_mods()
 
         self.fps = fps
         self.clock = pygame.time.Clock()
 
+        self.dirty_rendering = dirty_rendering
+        self.dirty_rects = []
+        self.full_redraw = True
+
+        self.idle = idle
+        self.needs_redraw = True
+        self.pending_events = []
+        self.animating = set()
+        self.timers = []
+        self.timer_ids = itertools.count()
+        self.cancelled_timers = set()
+
+        self.profiler = Profiler() if profile else None
+
+        self.layout_queue = []
+        self.layout_ids = itertools.count()
+
+        self.tasks = set()
+        self.next_frame = 0
+
+        self.callbacks = queue.SimpleQueue()
+        self.recorder = None
+        self.deferred = deque()
+        self.changed_observables = deque()
+        self.active_bindings = set()
+        self.thread_pool = None
+        self.process_pool = None
+
         self.initialise()
 
     def get_position(self):
         return (self.x, self.y)
 
+    def get_root(self):
+        return self
+
+    def get_draw_offset(self):
+        return (self.x, self.y)
+
+    def get_mouse_pos(self):
+        return self.mouse_pos
+
+    def get_key_mods(self):
+        return self.key_mods
+
     def close(self):
         self.running = False
 
     def add_element(self, element):
-        self.elements.append(element)
+        super().add_element(element)
+        self.full_redraw = True
+
+    def invalidate_element(self, element):
+        if not self.dirty_rendering: self.needs_redraw = True
+        elif not self.full_redraw: self.dirty_rects.append(element.get_dirty_rect())
+
+    def invalidate_rect(self, rect):
+        if not self.dirty_rendering: self.needs_redraw = True
+        elif not self.full_redraw: self.dirty_rects.append(pygame.Rect(rect))
+
+    def redraw(self):
+        self.full_redraw = True
+
+    def queue_layout(self, layout):
+        heapq.heappush(self.layout_queue, (layout.depth, next(self.layout_ids), layout))
+
+    def perform_layout(self):
+        while self.layout_queue:
+            layout = heapq.heappop(self.layout_queue)[2]
+            if layout.layout_dirty: layout.arrange()
+
+    def resize(self):
+        self.window = pygame.display.get_surface()
+        self.width, self.height = self.window.get_size()
+        for element in self.elements:
+            if isinstance(element, Layout) and element.fill:
+                element.set_dimensions((self.width, self.height))
+
+        self.redraw()
+
+    def set_focus(self, element):
+        if element is self.focused: return
+        previous = self.focused
+        self.focused = element
+        if previous: previous.set_focused(False)
+        if element: element.set_focused(True)
+
+    def focus_next(self, backwards = False):
+        chain = self.get_focus_chain()
+        if not chain: return
+        if self.focused in chain:
+            index = chain.index(self.focused) + (-1 if backwards else 1)
+
+        else:
+            index = -1 if backwards else 0
+
+        self.set_focus(chain[index % len(chain)])
+
+    def send_key_event(self, event):
+        focused = self.focused
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB and self.tab_navigation and not (focused and focused.captures_tab()):
+            self.focus_next(event.mod & pygame.KMOD_SHIFT)
+            return
+
+        if focused and focused.visible and focused.interactable:
+            if self.profiler: self.profiler.time_event(focused, event)
+            else: focused.check_event(event)
+
+    def request_frames(self, element):
+        self.animating.add(element)
+
+    def release_frames(self, element):
+        self.animating.discard(element)
+
+    def set_timer(self, delay, function, repeat = False, args = (), kwargs = None):
+        timer_id = next(self.timer_ids)
+        heapq.heappush(self.timers, (pygame.time.get_ticks() + delay, timer_id, delay, repeat, function, args, kwargs or {}))
+        return timer_id
+
+    def cancel_timer(self, timer_id):
+        if any(timer[1] == timer_id for timer in self.timers):
+            self.cancelled_timers.add(timer_id)
+
+    def run_timers(self):
+        now = pygame.time.get_ticks()
+        while self.timers and self.timers[0][0] <= now:
+            due, timer_id, delay, repeat, function, args, kwargs = heapq.heappop(self.timers)
+            if timer_id in self.cancelled_timers:
+                self.cancelled_timers.discard(timer_id)
+                continue
+
+            if repeat: heapq.heappush(self.timers, (max(due + delay, now), timer_id, delay, repeat, function, args, kwargs))
+            self.call(function, args, kwargs)
+            self.needs_redraw = True
+
+    def call(self, function, args = (), kwargs = None):
+        result = function(*args, **(kwargs or {}))
+        if asyncio.iscoroutine(result): return self.spawn(result)
+        return result
+
+    def defer(self, task, args = (), kwargs = None, callback = None):
+        if not inspect.isgenerator(task): task = self.deferred_call(task, args, kwargs or {})
+        self.deferred.append((task, callback))
+        return task
+
+    @staticmethod
+    def deferred_call(function, args, kwargs):
+        result = function(*args, **kwargs)
+        if inspect.isgenerator(result): result = yield from result
+        return result
+
+    def cancel_deferred(self, task):
+        self.deferred = deque(entry for entry in self.deferred if entry[0] is not task)
+        task.close()
+
+    def run_deferred(self, deadline):
+        while self.deferred:
+            task, callback = self.deferred.popleft()
+            step_start = time.perf_counter()
+            try:
+                next(task)
+
+            except StopIteration as stop:
+                if callback: self.call(callback, (stop.value,))
+
+            else:
+                self.deferred.append((task, callback))
+
+            self.needs_redraw = True
+            now = time.perf_counter()
+            if now + (now - step_start) >= deadline: break
+
+    def get_frame_deadline(self, frame_start):
+        return frame_start + 1 / self.fps if self.fps else frame_start
+
+    def call_soon_threadsafe(self, function, *args):
+        self.callbacks.put((function, args))
+        if self.idle: pygame.event.post(pygame.event.Event(WAKE_EVENT))
+
+    def run_callbacks(self):
+        while not self.callbacks.empty():
+            function, args = self.callbacks.get_nowait()
+            self.call(function, args)
+            self.needs_redraw = True
+
+    def queue_observable(self, observable):
+        self.changed_observables.append(observable)
+        if self.idle: pygame.event.post(pygame.event.Event(WAKE_EVENT))
+
+    def run_bindings(self):
+        while self.changed_observables:
+            observable = self.changed_observables.popleft()
+            observable.changed = False
+            self.active_bindings.update(observable.bindings)
+
+        if not self.active_bindings: return
+        now = time.perf_counter()
+        self.active_bindings = {binding for binding in self.active_bindings if binding.update(now)}
+
+    def submit(self, function, args = (), kwargs = None, callback = None, process = False):
+        if process:
+            if self.process_pool is None: self.process_pool = ProcessPoolExecutor()
+            future = self.process_pool.submit(function, *args, **(kwargs or {}))
+
+        else:
+            if self.thread_pool is None: self.thread_pool = ThreadPoolExecutor(thread_name_prefix="pygui-worker")
+            future = self.thread_pool.submit(function, *args, **(kwargs or {}))
+
+        if callback: future.add_done_callback(lambda future: self.call_soon_threadsafe(callback, future))
+        return future
+
+    def shutdown_workers(self):
+        for pool in (self.thread_pool, self.process_pool):
+            if pool: pool.shutdown(wait=False, cancel_futures=True)
+
+        self.thread_pool = self.process_pool = None
+
+    def spawn(self, coroutine):
+        try:
+            loop = asyncio.get_running_loop()
+
+        except RuntimeError:
+            return asyncio.run(coroutine)
+
+        task = loop.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def is_idle(self):
+        if self.animating or self.dirty_rects or self.full_redraw or self.needs_redraw or self.pending_events or self.layout_queue or not self.callbacks.empty() or self.changed_observables or self.active_bindings or self.deferred: return False
+        return not self.timers or self.timers[0][0] > pygame.time.get_ticks()
+
+    def wait_for_events(self, timeout = None):
+        if self.timers:
+            timer_timeout = self.timers[0][0] - pygame.time.get_ticks()
+            timeout = timer_timeout if timeout is None else min(timeout, timer_timeout)
+
+        if timeout is not None:
+            event = pygame.event.wait(max(1, int(timeout)))
+
+        else:
+            event = pygame.event.wait()
+
+        if event.type != pygame.NOEVENT:
+            self.pending_events.append(event)
+
+    def animate(self):
+        if not self.animating: return
+        for element in self.animating:
+            element.mark_dirty()
+
+        self.needs_redraw = True
+
+    def enable_profiling(self, history = 300):
+        if not self.profiler: self.profiler = Profiler(history)
+        return self.profiler
+
+    def disable_profiling(self):
+        self.profiler = None
+        self.redraw()
+
+    def toggle_profile_overlay(self):
+        if not self.profiler: return
+        self.profiler.toggle_overlay()
+        self.redraw()
+
+    def get_profile(self, top = 10):
+        return self.profiler.snapshot(top) if self.profiler else None
 
     def initialise(self):
         if self.fullscreen: self.keybinds[pygame.K_ESCAPE] = [self.close]
+        self.keybinds.setdefault(pygame.K_F3, []).append(self.toggle_profile_overlay)
 
     def do_keypress(self, key):
         if key in self.keybinds:
             functions = self.keybinds[key]
             for function in functions:
-                function()
-
-    def send_event(self, event):
-        for element in self.elements:
-            if element.visible and element.interactable:
-                element.check_event(event)
+                self.call(function)
 
     def draw_elements(self):
+        profiler = self.profiler
         for element in self.elements:
             if element.visible:
-                element.draw(self.window)
+                if profiler: profiler.time_draw(element, self.window)
+                else: element.draw(self.window)
+
+    def merge_rects(self, rects):
+        screen_rect = self.window.get_rect()
+        merged = []
+        for rect in rects:
+            rect = rect.clip(screen_rect)
+            if not rect.width or not rect.height: continue
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+
+            merged.append(rect)
+
+        return merged
+
+    def draw_dirty(self):
+        rects = self.merge_rects(self.dirty_rects)
+        self.dirty_rects = []
+        profiler = self.profiler
+        for rect in rects:
+            self.window.set_clip(rect)
+            self.window.fill(self.colour, rect)
+            for element in self.elements:
+                if element.visible and element.get_dirty_rect().colliderect(rect):
+                    if profiler: profiler.time_draw(element, self.window)
+                    else: element.draw(self.window)
+
+        self.window.set_clip(None)
+        return rects
 
     def get_screen(self):
         return self.window
 
-    def update(self):
-        for event in pygame.event.get():
+    def snapshot(self):
+        self.redraw()
+        self.draw_frame()
+        return self.window
+
+    def save_image(self, filename):
+        pygame.image.save(self.snapshot(), filename)
+
+    def to_bytes(self, format = "RGB"):
+        return pygame.image.tobytes(self.snapshot(), format)
+
+    def start_recording(self):
+        self.recorder = EventRecorder(self)
+        return self.recorder
+
+    def stop_recording(self):
+        recorder = self.recorder
+        self.recorder = None
+        return recorder
+
+    def replay(self, recording, realtime = False):
+        return EventReplayer(self, recording, realtime).run()
+
+    def process_events(self):
+        events = self.pending_events + pygame.event.get()
+        self.pending_events = []
+        if self.recorder: self.recorder.record(events)
+        if events: self.needs_redraw = True
+        for event in events:
+            if event.type in MOUSE_EVENTS and hasattr(event, "pos"):
+                self.mouse_pos = event.pos
+
+            if event.type in (pygame.KEYDOWN, pygame.KEYUP) and hasattr(event, "mod"):
+                self.key_mods = event.mod
+
             if event.type == pygame.KEYDOWN:
                 self.do_keypress(event.key)
         
             if event.type == pygame.QUIT:
                 self.close()
 
-            self.send_event(event)
+            if event.type == pygame.VIDEORESIZE:
+                self.resize()
 
-        self.window.fill(self.colour)
-        self.draw_elements()
-        pygame.display.flip()
-        
-        self.clock.tick(self.fps)
+            if event.type in KEY_EVENTS: self.send_key_event(event)
+            else: self.send_event(event)
 
-    def mainloop(self):
-        while self.running:
-            
-
-            for event in pygame.event.get():
-                if event.type == pygame.KEYDOWN:
-                    self.do_keypress(event.key)
-            
-                if event.type == pygame.QUIT:
-                    self.close()
-
-                self.send_event(event)
+    def draw_frame(self):
+        self.perform_layout()
+        overlay = self.profiler and self.profiler.overlay
+        if self.dirty_rendering and not self.full_redraw:
+            if overlay: self.invalidate_rect(self.profiler.overlay_rect)
+            rects = self.draw_dirty()
 
+        else:
+            self.full_redraw = False
+            self.dirty_rects = []
             self.window.fill(self.colour)
             self.draw_elements()
-            pygame.display.flip()
+            rects = None
+
+        if overlay:
+            overlay_rect = self.profiler.draw_overlay(self.window)
+            if rects is not None: rects.append(overlay_rect)
+
+        return rects
+
+    def present(self, rects):
+        if self.headless: return
+        if rects is None: pygame.display.flip()
+        elif rects: pygame.display.update(rects)
 
-            self.clock.tick(self.fps)
+    def render(self):
+        self.present(self.draw_frame())
 
+    def run_frame(self):
+        self.run_callbacks()
+        self.run_timers()
+        self.process_events()
+        self.run_bindings()
+        self.animate()
+        events_done = time.perf_counter()
+
+        rects = []
+        if not self.idle or self.dirty_rendering or self.needs_redraw or self.full_redraw:
+            rects = self.draw_frame()
+
+        drawn = time.perf_counter()
+        self.present(rects)
+        presented = time.perf_counter()
+
+        self.needs_redraw = False
+        return events_done, drawn, presented
+
+    def update(self):
+        start = time.perf_counter()
+        if self.idle and self.is_idle():
+            self.wait_for_events()
+
+        waited = time.perf_counter()
+        events_done, drawn, presented = self.run_frame()
+        if self.deferred: self.run_deferred(self.get_frame_deadline(waited))
+        deferred = time.perf_counter()
+        self.clock.tick(self.fps)
+        if self.profiler:
+            self.profiler.record_frame(events_done - waited, drawn - events_done, presented - drawn, waited - start + time.perf_counter() - deferred, deferred - presented)
+
+        return waited, events_done
+
+    def mainloop(self):
+        while self.running:
+            self.update()
+
+        self.shutdown_workers()
         pygame.quit()
 
+    async def wait_for_events_async(self, poll_interval):
+        while self.running and self.is_idle() and not pygame.event.peek():
+            delay = poll_interval
+            if self.timers: delay = min(delay, max(0, self.timers[0][0] - pygame.time.get_ticks()) / 1000)
+            await asyncio.sleep(delay)
+
+    async def pace_frame(self):
+        now = time.perf_counter()
+        if not self.fps:
+            self.next_frame = now
+            await asyncio.sleep(0)
+            return
+
+        period = 1 / self.fps
+        self.next_frame += period
+        if self.next_frame < now - period: self.next_frame = now
+        await asyncio.sleep(max(0, self.next_frame - now))
+
+    async def update_async(self, poll_interval = 0.005):
+        start = time.perf_counter()
+        if self.idle: await self.wait_for_events_async(poll_interval)
+        waited = time.perf_counter()
+        events_done, drawn, presented = self.run_frame()
+        if self.deferred: self.run_deferred(self.get_frame_deadline(waited))
+        deferred = time.perf_counter()
+        self.clock.tick()
+        await self.pace_frame()
+        if self.profiler:
+            self.profiler.record_frame(events_done - waited, drawn - events_done, presented - drawn, waited - start + time.perf_counter() - deferred, deferred - presented)
+
+    async def run_async(self, poll_interval = 0.005):
+        self.next_frame = time.perf_counter()
+        try:
+            while self.running:
+                await self.update_async(poll_interval)
+
+        finally:
+            for task in self.tasks: task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            self.shutdown_workers()
+            pygame.quit()
+
+def render_screen(build, size, filename = None, format = "RGB", colour = (200, 200, 200)):
+    window = Window(size[0], size[1], colour=colour, headless=True)
+    build(window)
+    if filename is None: return window.to_bytes(format)
+    window.save_image(filename)
+    return filename
+
+def render_job(job):
+    return render_screen(*job)
+
+def render_batch(jobs, max_workers = None):
+    jobs = list(jobs)
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers) as pool:
+        return list(pool.map(render_job, jobs, chunksize=max(1, len(jobs) // (max_workers * 4))))
+
 def main():
 
     window = Window(fullscreen=True)